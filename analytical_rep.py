@@ -30,6 +30,8 @@ from functions.functions import (
     get_sniper_kills,
     get_teams,
 )
+from functions.match_store import get_match_archive
+from functions.prefetch import prefetch_matches
 
 PLAYER_LIST: Dict[str, str] = {
     "TH": "TH Boo",
@@ -805,10 +807,8 @@ def _pick_matches(
             raise AnalyticalReportError("No matches could be selected with the requested count.")
 
         match_ids = [m["matchId"] for m in selected]
-        sleep_fn(0.3)
-        first_match = get_match_by_match_id(match_ids[0], "esports")
-        sleep_fn(0.3)
-        last_match = get_match_by_match_id(match_ids[-1], "esports")
+        first_match = _get_match(match_ids[0], sleep_fn)
+        last_match = _get_match(match_ids[-1], sleep_fn)
 
         most_recent = _summarize_match(first_match, context.tag)
         oldest = _summarize_match(last_match, context.tag)
@@ -858,15 +858,34 @@ def _pick_matches(
         _notify("Please respond with yes or no.", progress_callback)
 
 
+def _get_match(match_id: str, sleep_fn: Callable[[float], None]) -> Dict:
+    """Load a match from the local archive, or download it paced by the valolytics limiter."""
+    cached = get_match_archive().get(match_id, "esports")
+    if cached is not None:
+        return cached
+    # Lets cancellation-aware sleepers abort before we wait on the limiter.
+    sleep_fn(0)
+    return get_match_by_match_id(match_id, "esports")
+
+
 def _fetch_match_payloads(
     match_ids: Sequence[str], sleep_fn: Callable[[float], None], progress_callback: ProgressCallback
 ) -> Dict[str, Dict]:
-    data_matches: Dict[str, Dict] = {}
-    for match_id in match_ids:
-        _notify(f"Fetching match {match_id}", progress_callback)
-        sleep_fn(1)
-        data_matches[match_id] = get_match_by_match_id(match_id, "esports")
-    return data_matches
+    fetched: Dict[str, Dict] = {}
+    total = len(match_ids)
+    missing = set(get_match_archive().missing(match_ids, "esports"))
+    if len(missing) < total:
+        _notify(f"{total - len(missing)} of {total} matches loaded from the local archive.", progress_callback)
+    if missing:
+        _notify(f"Fetching {len(missing)} match(es) from valolytics…", progress_callback)
+
+    for match_id, payload in prefetch_matches(match_ids, "esports", sleep_fn=sleep_fn):
+        fetched[match_id] = payload
+        if match_id in missing:
+            _notify(f"Fetched match {match_id} ({len(fetched)}/{total})", progress_callback)
+
+    # Keep the caller's (most recent first) ordering regardless of arrival order.
+    return {match_id: fetched[match_id] for match_id in match_ids if match_id in fetched}
 
 
 def _format_overall_sheet(
@@ -31,7 +31,11 @@ from google.cloud import storage
 from google.oauth2 import service_account
 import calendar
 import uuid
-from functions import PROJECT_ROOT
+from functions import PROJECT_ROOT, get_http_client
+from functions.player_search import get_opponents_index
+from functions.player_stats import StatsQuery, get_player_stats_table
+from functions.scrims import ScrimStore, ScrimStoreLoader
+from functions.stats_cube import ALL as CUBE_ALL, get_stats_cube
 from redis.exceptions import RedisError
 from rq import Queue
 from rq.job import Job
@@ -40,10 +44,19 @@ import requests
 from bs4 import BeautifulSoup
 
 from jobs.analytical_report_job import run_analytical_report_job
+from jobs.search_player_job import (
+    SEARCH_NAMESPACE,
+    SEARCH_QUEUE,
+    get_cached_profile,
+    run_search_player_job,
+)
 from services.analytical_jobs import AnalyticalJobStore, get_redis_connection, utc_now_iso
+from services.http_cache import init_http_caching
+from services.scrim_cache import ScrimSheetCache
 
 app = Flask(__name__)
 app.secret_key = 'teamheretics'
+init_http_caching(app)
 
 BUCKET_NAME = "bucket-reports1"
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "api_keys/reports.json"
@@ -63,6 +76,8 @@ app.config.setdefault("REDIS_URL", os.getenv("REDIS_URL", "redis://127.0.0.1:637
 redis_connection = None
 analytical_queue = None
 analytical_job_store = None
+search_queue = None
+search_job_store = None
 
 try:
     redis_connection = get_redis_connection(app.config["REDIS_URL"])
@@ -76,6 +91,8 @@ except RedisError as exc:
 else:
     analytical_queue = Queue("analytical-reports", connection=redis_connection, default_timeout=1200)
     analytical_job_store = AnalyticalJobStore(redis_connection)
+    search_queue = Queue(SEARCH_QUEUE, connection=redis_connection, default_timeout=600)
+    search_job_store = AnalyticalJobStore(redis_connection, namespace=SEARCH_NAMESPACE)
 
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -141,6 +158,9 @@ def get_scrim_data():
     values = result.get('values', [])
     return values
 
+# Shared across workers through Redis (or data/scrims/sheet.json without it).
+scrim_sheet_cache = ScrimSheetCache(get_scrim_data, parser=ScrimStoreLoader(), redis_conn=redis_connection)
+
 MAP_RANKING_PLAYERS = [
     {"id": "miniboo", "label": "MiniBoo"},
     {"id": "woot", "label": "Wo0t"},
@@ -155,9 +175,6 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 PUUID_LIST_PATH = STATIC_DIR / "puuid_list.json"
 OPPONENTS_PATH = STATIC_DIR / "opponents.json"
 
-with OPPONENTS_PATH.open("r", encoding="utf-8") as f:
-    opponents_data = json.load(f)
-
 ANALYTICAL_LIBRARY_FILE = DATA_DIR / "analytical_reports.json"
 ANALYTICAL_STATIC_REPORTS = [
     {
@@ -323,7 +340,7 @@ def get_published_sheet_metadata(spreadsheet_url: str) -> dict:
     if cached and now_monotonic - cached["timestamp"] < SHEET_META_CACHE_TTL:
         return cached["data"]
 
-    response = requests.get(normalised_url, timeout=10)
+    response = get_http_client().get(normalised_url, timeout=10)
     response.raise_for_status()
 
     sheets, doc_title = _parse_published_sheet_metadata(response.text)
@@ -495,6 +512,55 @@ def stats():
     return render_template('stats.html', active_page="stats")
 
 
+@app.route('/api/stats/players')
+@login_required
+def stats_players():
+    """One page of the player stats table, filtered and sorted server-side."""
+    try:
+        query = StatsQuery.from_args(request.args)
+        page = get_player_stats_table().query(query)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(page.to_dict())
+
+
+@app.route('/api/stats/players/options')
+@login_required
+def stats_players_options():
+    """Column metadata and distinct team/player/agent/event values for the filters."""
+    table = get_player_stats_table()
+    return jsonify({
+        "headers": table.headers,
+        "numeric_columns": table.numeric_columns,
+        **table.options(),
+    })
+
+
+@app.route('/api/stats/cube')
+@login_required
+def stats_cube():
+    """Precomputed team/event/agent aggregates.
+
+    ``event``, ``team`` and ``agent`` pick a cell (``*`` = all teams/agents);
+    with ``by=team|agent|event`` every cell along that dimension is returned.
+    """
+    cube = get_stats_cube()
+    event = request.args.get("event", "All")
+    team = request.args.get("team", CUBE_ALL)
+    agent = request.args.get("agent", CUBE_ALL)
+    by = request.args.get("by")
+    if by:
+        try:
+            cells = cube.slice(by, event, team, agent)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify({"event": event, "team": team, "agent": agent, "by": by, "cells": cells})
+    cell = cube.cell(event, team, agent)
+    if cell is None:
+        return jsonify({"error": "No stats for that event/team/agent."}), 404
+    return jsonify({"cell": cell})
+
+
 @app.route('/map-rankings', methods=['GET', 'POST'])
 @login_required
 def map_rankings():
@@ -697,45 +763,14 @@ def scrims():
         end_date_str = end_date.isoformat()
         title_text = ""
 
-    # Fetch all scrim data from Google Sheets
-    scrim_data = get_scrim_data()  # Replace with your function to fetch data
-    scrim_data = process_scrim_data(scrim_data)
+    # Date-indexed scrim records, built once per sheet load by the shared cache
+    # (refreshed in the background when stale).
+    scrim_sheet = scrim_sheet_cache.get()
+    scrim_store = scrim_sheet.records or ScrimStore([])
 
-    # Determine the latest scrim date present in the sheet (for header context)
-    latest_scrim_date = None
-    for row in scrim_data:
-        if not row or row[0] in ['VOD LINK', 'DATE']:
-            continue
-        try:
-            d = datetime.datetime.strptime(row[0], '%B %d, %Y').date()
-        except ValueError:
-            continue
-        if latest_scrim_date is None or d > latest_scrim_date:
-            latest_scrim_date = d
+    # Latest scrim date present in the sheet (for header context)
+    latest_scrim_date = scrim_store.latest_date
 
-    # Filter scrim data based on the selected date range
-    filtered_data = []
-    for row in scrim_data:
-        if not row or row[0] == 'VOD LINK' or row[0] == 'DATE':
-            continue
-        try:
-            scrim_date = datetime.datetime.strptime(row[0], '%B %d, %Y').date()
-        except ValueError:
-            continue
-        if start_date <= scrim_date <= end_date:
-            filtered_data.append(row)
-
-    # Optional filter by scrim type (column index 1)
-    def _matches_scrim_type(value: str) -> bool:
-        if scrim_type in (None, '', 'all'):
-            return True
-        v = (value or '').strip().lower()
-        if scrim_type in ('grey', 'gray'):
-            return ('grey' in v) or ('gray' in v)
-        return scrim_type in v  # substring match to be resilient (e.g., "green scrim")
-
-    filtered_data = [r for r in filtered_data if len(r) > 1 and _matches_scrim_type(r[1] if len(r) > 1 else '')]
-    win_stats = compute_win_stats(filtered_data)
     # Baseline: year average metrics for comparison (same year as selection)
     # Determine baseline year
     baseline_year = None
@@ -747,24 +782,17 @@ def scrims():
         except Exception:
             baseline_year = datetime.date.today().year
 
-    # Filter to full calendar year for baseline
-    baseline_start = datetime.date(baseline_year, 1, 1)
-    baseline_end = datetime.date(baseline_year, 12, 31)
-    baseline_filtered = []
-    for row in scrim_data:
-        if not row or row[0] in ['VOD LINK', 'DATE']:
-            continue
-        try:
-            bd = datetime.datetime.strptime(row[0], '%B %d, %Y').date()
-        except ValueError:
-            continue
-        if baseline_start <= bd <= baseline_end:
-            baseline_filtered.append(row)
-
-    # Apply same scrim-type filter to baseline for fair comparison
-    baseline_filtered = [r for r in baseline_filtered if len(r) > 1 and _matches_scrim_type(r[1] if len(r) > 1 else '')]
-
-    baseline_win_stats = compute_win_stats(baseline_filtered)
+    # Selected date range and full calendar year baseline, composed from monthly
+    # aggregates (same scrim-type filter on both for fair comparison)
+    views = scrim_store.aggregate(
+        {
+            'selection': (start_date, end_date),
+            'baseline': (datetime.date(baseline_year, 1, 1), datetime.date(baseline_year, 12, 31)),
+        },
+        scrim_type,
+    )
+    win_stats = views['selection'].win_stats()
+    baseline_win_stats = views['baseline'].win_stats()
 
     def _aggregate_wr(stats_list):
         if not stats_list:
@@ -791,10 +819,11 @@ def scrims():
         }
 
     baseline_wr = _aggregate_wr(baseline_win_stats)
-    agent_winrates = get_agent_winrates(scrim_data)
+    # Whole-sheet aggregates are computed once per sheet load
+    agent_winrates = scrim_store.overall.agent_winrates()
     # Head-to-head (computed on filtered data to reflect current selection)
-    head_to_head = compute_head_to_head_summary(filtered_data)
-    opp_comps = get_scrim_teams(scrim_data)
+    head_to_head = views['selection'].head_to_head()
+    opp_comps = scrim_store.overall.scrim_teams()
     
     return render_template(
         'scrims.html', 
@@ -813,9 +842,21 @@ def scrims():
         baseline_pistol_wr=baseline_wr['pistol_wr'],
         scrim_type=scrim_type,
         head_to_head=head_to_head,
+        sheet_synced_age=_describe_age(scrim_sheet.age_seconds),
     )
 
 
+@app.route('/scrims/refresh', methods=['POST'])
+@login_required
+def refresh_scrims():
+    """Re-read the scrim sheet now instead of waiting for the cache TTL."""
+    try:
+        scrim_sheet_cache.refresh()
+    except Exception:
+        app.logger.exception("Manual scrim sheet refresh failed")
+    return redirect(url_for('scrims', **request.args.to_dict()))
+
+
 
 
 @app.route('/pick&bans', methods=['GET', 'POST'])
@@ -1279,22 +1320,15 @@ def analytical_job_details(job_id: str):
     return jsonify({"job_id": job_id, "meta": meta, "events": events})
 
 
-@app.route("/analytical_reports/jobs/<job_id>/stream", methods=["GET"])
-@login_required
-def analytical_job_stream(job_id: str):
-    if analytical_job_store is None or redis_connection is None:
-        abort(503, description="Live streaming is unavailable because Redis is offline.")
-    meta = analytical_job_store.get_meta(job_id)
-    if not meta:
-        abort(404, description="Job not found.")
-
-    keys = analytical_job_store.keys(job_id)
+def _job_event_stream(store: AnalyticalJobStore, job_id: str) -> Response:
+    """SSE response replaying a job's event log, then relaying its pub/sub channel."""
+    keys = store.keys(job_id)
     pubsub = redis_connection.pubsub()
     pubsub.subscribe(keys.channel)
 
     def generate_stream():
         try:
-            for event in analytical_job_store.log_lines(job_id):
+            for event in store.log_lines(job_id):
                 event_type = event.get("type", "progress")
                 yield f"event: {event_type}\n"
                 yield f"data: {json.dumps(event)}\n\n"
@@ -1334,6 +1368,17 @@ def analytical_job_stream(job_id: str):
     return response
 
 
+@app.route("/analytical_reports/jobs/<job_id>/stream", methods=["GET"])
+@login_required
+def analytical_job_stream(job_id: str):
+    if analytical_job_store is None or redis_connection is None:
+        abort(503, description="Live streaming is unavailable because Redis is offline.")
+    meta = analytical_job_store.get_meta(job_id)
+    if not meta:
+        abort(404, description="Job not found.")
+    return _job_event_stream(analytical_job_store, job_id)
+
+
 @app.route("/analytical_reports/jobs/<job_id>/input", methods=["POST"])
 @login_required
 def analytical_job_input(job_id: str):
@@ -1523,13 +1568,34 @@ def time_filter(date_str):
     return date
 
 from functions.rankeds import (
-    get_players_data,
+    missing_kda_extracts,
     regenerate_kda,
-    get_other_players_data,
-    RANKEDS_FILE,
-    RANKEDS_KDA_FILE,
-    RANKEDS_OTHER_FILE,
+    load_refresh_status,
+    refresh_rankeds_tables,
+    seconds_since_refresh,
+)
+from functions.rankeds_index import query_rankeds_window
+from jobs.rankeds_job import (
+    RANKEDS_REFRESH_SECONDS,
+    enqueue_kda_extract,
+    enqueue_rankeds_refresh,
+    start_kda_extract_thread,
 )
+
+
+def _describe_age(seconds):
+    if seconds is None:
+        return None
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} min ago"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours} h {minutes} min ago"
+    return f"{hours // 24} days ago"
+
 @app.route('/rankeds')
 @login_required
 def rankeds():
@@ -1556,41 +1622,53 @@ def rankeds():
         start_date_2, end_date_2 = default_start, today
         start_str_2, end_str_2   = start_date_2.isoformat(), end_date_2.isoformat()
 
-    # decide which table to rebuild
     which = request.args.get('which', "rankeds")
     with PUUID_LIST_PATH.open("r", encoding="utf-8") as handle:
         full_list = json.load(handle)
-    if which is None:
-        get_players_data(start_date, end_date)
-        get_other_players_data(start_date_2, end_date_2, full_list)
-    elif which == "rankeds":
-        get_players_data(start_date, end_date)
-    elif which == "full_list":
-        get_other_players_data(start_date_2, end_date_2, full_list)
-
-    # now read both data files (they’re up-to-date)
-    with RANKEDS_FILE.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-        number_competitive = {p: sum(d["competitive"] for d in days.values()) for p, days in data.items()}
-        number_deathmatchs = {p: sum(d["deathmatch"] for d in days.values()) for p, days in data.items()}
-        number_hurms        = {p: sum(d["hurm"]        for d in days.values()) for p, days in data.items()}
-
-    with RANKEDS_KDA_FILE.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-        kd  = {p: round(d["all"][0]/d["all"][1], 2) for p, d in data.items()}
-        vlr = {p: d["all"][2]/d["all"][1]          for p, d in data.items()}
-
-    with RANKEDS_OTHER_FILE.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-        rankds_2 = {p: sum(d["competitive"] for d in days.values()) for p, days in data.items()}
-        dms_2    = {p: sum(d["deathmatch"]   for d in days.values()) for p, days in data.items()}
-        hurms_2  = {p: sum(d["hurm"]         for d in days.values()) for p, days in data.items()}
+
+    # Tables are precomputed by the rankeds RQ job; this only reads local data.
+    refresh_status = load_refresh_status()
+    refresh_age = seconds_since_refresh(refresh_status)
+    if redis_connection is not None and (refresh_age is None or refresh_age > 2 * RANKEDS_REFRESH_SECONDS):
+        # Scheduler not keeping up (or never ran): nudge a worker.
+        try:
+            enqueue_rankeds_refresh(redis_connection)
+        except RedisError as exc:
+            app.logger.warning("Could not enqueue rankeds refresh: %s", exc)
+
+    data = query_rankeds_window(start_date, end_date)
+    number_competitive = {p: d["totals"]["competitive"] for p, d in data.items()}
+    number_deathmatchs = {p: d["totals"]["deathmatch"]  for p, d in data.items()}
+    number_hurms        = {p: d["totals"]["hurm"]        for p, d in data.items()}
+
+    # Re-aggregated from the stored per-match extracts for the selected window. The
+    # scheduled refresh only extracts the default window: fetch anything missing
+    # in the background (a local thread without Redis) and flag the K/D as pending meanwhile.
+    kda_pending = False
+    if missing_kda_extracts(start_date, end_date):
+        if redis_connection is None:
+            kda_pending = start_kda_extract_thread(start_date, end_date)
+        else:
+            try:
+                kda_pending = enqueue_kda_extract(redis_connection, start_date, end_date) is not None
+            except RedisError as exc:
+                app.logger.warning("Could not enqueue KDA extracts: %s", exc)
+    data = regenerate_kda(start_date, end_date, refresh=False)
+    kd  = {p: round(d["all"][0]/d["all"][1], 2) if d["all"][1] else 0 for p, d in data.items()}
+    vlr = {p: d["all"][2]/d["all"][1] if d["all"][1] else 0           for p, d in data.items()}
+
+    data = query_rankeds_window(start_date_2, end_date_2, full_list)
+    rankds_2 = {p: d["totals"]["competitive"] for p, d in data.items()}
+    dms_2    = {p: d["totals"]["deathmatch"]  for p, d in data.items()}
+    hurms_2  = {p: d["totals"]["hurm"]        for p, d in data.items()}
 
     return render_template(
         'rankeds2.html',
         active_page="rankeds",
         role=session['role'],
         which=which,
+        refreshed_at=(refresh_status or {}).get("refreshed_at"),
+        refresh_age=_describe_age(refresh_age),
 
         # 1st table
         start_date=start_str,
@@ -1599,6 +1677,7 @@ def rankeds():
         number_deathmatchs=number_deathmatchs,
         number_hurms=number_hurms,
         kd=kd,
+        kda_pending=kda_pending,
 
         # 2nd table
         start_date_2=start_str_2,
@@ -1611,6 +1690,40 @@ def rankeds():
 
 
 
+@app.route('/rankeds/data')
+@login_required
+def rankeds_data():
+    """Queue counts per player between ``start_date`` and ``end_date``, from local data only."""
+    today = datetime.date.today()
+    try:
+        start_date = datetime.datetime.strptime(
+            request.args.get("start_date", (today - timedelta(weeks=2)).isoformat()), "%Y-%m-%d"
+        ).date()
+        end_date = datetime.datetime.strptime(request.args.get("end_date", today.isoformat()), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "Dates must use the YYYY-MM-DD format."}), 400
+    if start_date > end_date:
+        return jsonify({"error": "start_date must not be after end_date."}), 400
+
+    table = request.args.get("table", "rankeds")
+    if table == "rankeds":
+        tracked = None
+    elif table == "full_list":
+        with PUUID_LIST_PATH.open("r", encoding="utf-8") as handle:
+            tracked = json.load(handle)
+    else:
+        return jsonify({"error": "table must be 'rankeds' or 'full_list'."}), 400
+
+    include_days = request.args.get("days", "0").lower() in {"1", "true", "yes"}
+    return jsonify({
+        "table": table,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "refreshed_at": (load_refresh_status() or {}).get("refreshed_at"),
+        "players": query_rankeds_window(start_date, end_date, tracked, include_days=include_days),
+    })
+
+
 @app.route('/update_kda', methods=['POST'])
 @login_required
 def update_kda():
@@ -1619,7 +1732,8 @@ def update_kda():
         return jsonify(success=False, message="Unauthorized"), 403
 
     try:
-        regenerate_kda()
+        # Same path as the scheduled job, so the counts, K/D and status all move together.
+        refresh_rankeds_tables()
         return jsonify(success=True)
     except Exception as e:
         return jsonify(success=False, message=str(e)), 500
@@ -1645,11 +1759,30 @@ def search_player():
         else:
             print("Player found. Wait for the data.")
         data_player = data[player_name]
-        puuid = get_puuid_by_riotid(data_player["gameName"], data_player["tagLine"], data_player["region"])["puuid"]
-        matchlist = get_matchlist_by_puuid(puuid, data_player["region_matchlist"])
         if time_range == "last_week":
-            ranked_data, last_day = get_ranked_info_twoweeks(matchlist, puuid, data_player)
+            if search_job_store is not None and search_queue is not None:
+                cached = get_cached_profile(redis_connection, data_player)
+                if cached is not None:
+                    return jsonify({"success": True, **cached})
+                # Deep lookups can outlive a gunicorn timeout; let a worker build it.
+                job_id = uuid.uuid4().hex
+                search_job_store.create(job_id, created_by=session.get("username"), player_name=player_name)
+                search_queue.enqueue(
+                    run_search_player_job,
+                    job_id,
+                    player_name=player_name,
+                    data_player=data_player,
+                    job_id=f"search-{job_id}",
+                    description=f"Ranked profile for {player_name}",
+                    result_ttl=3600,
+                    failure_ttl=3600,
+                )
+                return jsonify({"success": True, "job_id": job_id, "status": "queued"}), 202
+            # Cached per puuid for a few minutes; matches are fetched concurrently.
+            ranked_data, last_day = get_ranked_profile(data_player)
         else:
+            puuid = get_puuid_by_riotid(data_player["gameName"], data_player["tagLine"], data_player["region"])["puuid"]
+            matchlist = get_matchlist_by_puuid(puuid, data_player["region_matchlist"])
             ranked_data = get_ranked_info(matchlist, puuid, data_player)
         return jsonify({
             "success": True,
@@ -1660,6 +1793,16 @@ def search_player():
         print(f"Error: {e}")
         return jsonify({"success": False}), 500
 
+
+@app.route("/search_player/jobs/<job_id>/stream", methods=["GET"])
+@login_required
+def search_player_job_stream(job_id: str):
+    if search_job_store is None or redis_connection is None:
+        abort(503, description="Live streaming is unavailable because Redis is offline.")
+    if not search_job_store.get_meta(job_id):
+        abort(404, description="Job not found.")
+    return _job_event_stream(search_job_store, job_id)
+
 from dateutil import parser
 
 @app.route('/get-events')
@@ -1916,8 +2059,8 @@ def search_player_autocomplete():
     if not query:
         return jsonify({"success": True, "players": []})
     
-    # Search for players whose names contain the query string
-    matching_players = [player for player in opponents_data if query in player.lower()]
+    # Ranked top-K substring matches from the n-gram index (reloads on file change)
+    matching_players = get_opponents_index().search(query)
 
     return jsonify({"success": True, "players": matching_players})
 
@@ -1,3 +1,4 @@
 from .config import PROJECT_ROOT, Settings, get_settings
+from .http_client import HttpClient, get_http_client
 
-__all__ = ["PROJECT_ROOT", "Settings", "get_settings"]
+__all__ = ["PROJECT_ROOT", "Settings", "get_settings", "HttpClient", "get_http_client"]
@@ -0,0 +1,266 @@
+"""Column-oriented binary copies of the row-oriented stats datasets.
+
+``static/dataset_players*.json`` are lists of ~40-key dicts. The converter
+stores them column-wise in one file: numeric columns as typed little-endian
+arrays (``int32`` when every value is an integer, ``float64`` with NaN for
+blanks otherwise) and text columns dictionary-encoded as ``int32`` codes into
+a sorted list of categories.
+
+Layout::
+
+    MAGIC | u64 header length | JSON header | column buffers (64-byte aligned)
+
+The loader memory-maps the file read-only and exposes every column as a
+zero-copy NumPy view, so all gunicorn workers share the same page-cache
+pages. Converted files live under ``data/stats`` and are rebuilt whenever
+the source JSON is newer.
+
+Run ``python -m functions.columnar [source.json ...]`` to convert eagerly.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .config import PROJECT_ROOT
+
+COLUMNAR_DIR = PROJECT_ROOT / "data" / "stats"
+DATASETS: Dict[str, Path] = {
+    "players": PROJECT_ROOT / "static" / "dataset_players.json",
+    "players_old": PROJECT_ROOT / "static" / "dataset_players_old.json",
+}
+
+MAGIC = b"VHCOLS1\n"
+FORMAT_VERSION = 1
+_ALIGN = 64
+_LENGTH = struct.Struct("<Q")
+_NUMERIC_SAMPLE = 50
+_INT32 = np.iinfo(np.int32)
+_CONVERT_LOCK = threading.Lock()
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_numeric_column(values: Sequence[Any]) -> bool:
+    """Same heuristic the stats page used: >80% of the first non-blank values parse as numbers."""
+    seen = numeric = 0
+    for value in values:
+        if value is None or value == "":
+            continue
+        seen += 1
+        if _to_number(value) is not None:
+            numeric += 1
+        if seen >= _NUMERIC_SAMPLE:
+            break
+    return seen > 0 and numeric / seen > 0.8
+
+
+def _encode_column(values: Sequence[Any]) -> Dict[str, Any]:
+    if is_numeric_column(values):
+        if all(isinstance(v, int) and not isinstance(v, bool) and _INT32.min <= v <= _INT32.max for v in values):
+            return {"kind": "numeric", "array": np.asarray(values, dtype="<i4")}
+        numbers = [_to_number(v) for v in values]
+        return {
+            "kind": "numeric",
+            "array": np.asarray([np.nan if n is None else n for n in numbers], dtype="<f8"),
+        }
+    texts = ["" if v is None else str(v) for v in values]
+    categories = sorted(set(texts))
+    lookup = {category: code for code, category in enumerate(categories)}
+    return {
+        "kind": "category",
+        "array": np.asarray([lookup[text] for text in texts], dtype="<i4"),
+        "categories": categories,
+    }
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def write_columnar(target: Path, rows: Sequence[Mapping[str, Any]], *, source: Optional[Path] = None) -> Path:
+    """Write ``rows`` to ``target`` in the columnar format (atomically)."""
+    target = Path(target)
+    headers: List[str] = list(rows[0]) if rows else []
+    encoded = [(header, _encode_column([row.get(header) for row in rows])) for header in headers]
+
+    columns_meta: List[Dict[str, Any]] = []
+    offset = 0
+    for header, column in encoded:
+        array = column["array"]
+        meta = {"name": header, "kind": column["kind"], "dtype": array.dtype.str, "offset": offset}
+        if column["kind"] == "category":
+            meta["categories"] = column["categories"]
+        columns_meta.append(meta)
+        offset = _aligned(offset + array.nbytes)
+
+    header_blob = json.dumps(
+        {
+            "version": FORMAT_VERSION,
+            "rows": len(rows),
+            "source": str(source) if source else None,
+            "columns": columns_meta,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + _LENGTH.size + len(header_blob))
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(MAGIC)
+            handle.write(_LENGTH.pack(len(header_blob)))
+            handle.write(header_blob)
+            for meta, (_, column) in zip(columns_meta, encoded):
+                handle.seek(data_start + meta["offset"])
+                handle.write(column["array"].tobytes())
+            handle.truncate(data_start + offset)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return target
+
+
+def columnar_path(source: Path) -> Path:
+    return COLUMNAR_DIR / f"{Path(source).stem}.cols"
+
+
+def convert_json_dataset(source: Path, target: Optional[Path] = None) -> Path:
+    """Convert a ``{"rows": [...]}`` (or bare list) JSON dataset."""
+    source = Path(source)
+    with source.open("r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+    rows = payload.get("rows", []) if isinstance(payload, dict) else payload
+    return write_columnar(target or columnar_path(source), rows, source=source)
+
+
+class ColumnarDataset:
+    """Equal-length columns: typed arrays, or category codes plus their dictionary.
+
+    :meth:`open` returns read-only views over a memory-mapped file; the
+    constructor also accepts plain in-memory arrays.
+    """
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        arrays: Mapping[str, np.ndarray],
+        categories: Optional[Mapping[str, List[str]]] = None,
+        *,
+        path: Optional[Path] = None,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.headers: List[str] = list(headers)
+        self._arrays: Dict[str, np.ndarray] = dict(arrays)
+        self._categories: Dict[str, List[str]] = dict(categories or {})
+        self.numeric_columns: List[str] = [name for name in self.headers if name not in self._categories]
+        self.size: int = len(self._arrays[self.headers[0]]) if self.headers else 0
+        self._mmap: Optional[mmap.mmap] = None
+
+    @classmethod
+    def open(cls, path: Path) -> "ColumnarDataset":
+        path = Path(path)
+        with path.open("rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a columnar dataset.")
+        (header_length,) = _LENGTH.unpack_from(buffer, len(MAGIC))
+        header_end = len(MAGIC) + _LENGTH.size + header_length
+        header = json.loads(bytes(buffer[len(MAGIC) + _LENGTH.size:header_end]).decode("utf-8"))
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} uses unsupported format version {header.get('version')!r}.")
+        data_start = _aligned(header_end)
+
+        size = header["rows"]
+        arrays: Dict[str, np.ndarray] = {}
+        categories: Dict[str, List[str]] = {}
+        for meta in header["columns"]:
+            arrays[meta["name"]] = np.frombuffer(
+                buffer, dtype=np.dtype(meta["dtype"]), count=size, offset=data_start + meta["offset"]
+            )
+            if meta["kind"] == "category":
+                categories[meta["name"]] = meta["categories"]
+        dataset = cls([meta["name"] for meta in header["columns"]], arrays, categories, path=path)
+        dataset.size = size
+        dataset._mmap = buffer
+        return dataset
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._arrays
+
+    def column(self, name: str) -> np.ndarray:
+        """The raw column: values for numeric columns, category codes for text ones."""
+        return self._arrays[name]
+
+    def categories(self, name: str) -> Optional[List[str]]:
+        """Dictionary of a text column, or None for numeric columns."""
+        return self._categories.get(name)
+
+    def is_numeric(self, name: str) -> bool:
+        return name in self._arrays and name not in self._categories
+
+
+def load_columnar(source: Path) -> ColumnarDataset:
+    """Open the columnar copy of ``source``, (re)building it if missing or stale."""
+    source = Path(source)
+    target = columnar_path(source)
+    try:
+        stale = target.stat().st_mtime_ns < source.stat().st_mtime_ns
+    except FileNotFoundError:
+        stale = True
+    if stale:
+        with _CONVERT_LOCK:
+            convert_json_dataset(source, target)
+    return ColumnarDataset.open(target)
+
+
+def _cli(argv: Sequence[str]) -> int:
+    sources = [Path(arg) for arg in argv] or list(DATASETS.values())
+    for source in sources:
+        target = convert_json_dataset(source)
+        print(f"{source} -> {target} ({target.stat().st_size} bytes)")
+    return 0
+
+
+__all__ = [
+    "COLUMNAR_DIR",
+    "DATASETS",
+    "ColumnarDataset",
+    "columnar_path",
+    "convert_json_dataset",
+    "is_numeric_column",
+    "load_columnar",
+    "write_columnar",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(_cli(sys.argv[1:]))
@@ -0,0 +1,271 @@
+"""In-memory catalogue of static game content (maps, agents, weapons).
+
+valorant-api.com data only changes with game patches, so it is downloaded
+once, kept in dicts keyed by UUID (and ``mapUrl`` for maps), persisted to
+``data/content/valorant_content.json`` together with the patch version it was
+built from, and refreshed by a background thread when a new patch ships.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import PROJECT_ROOT
+from .riot_api import get_agents, get_content_version, get_maps, get_weapons
+
+CONTENT_DIR = PROJECT_ROOT / "data" / "content"
+CONTENT_FILE = CONTENT_DIR / "valorant_content.json"
+try:
+    REFRESH_INTERVAL_SECONDS = max(60, int(os.getenv("CONTENT_REFRESH_SECONDS", "21600")))
+except ValueError:
+    REFRESH_INTERVAL_SECONDS = 21600
+
+# Heavy fields we never read; dropping them keeps the on-disk file small.
+_DROPPED_FIELDS = {
+    "weapons": ("skins",),
+    "agents": ("voiceLine", "recruitmentData"),
+    "maps": (),
+}
+
+
+def _version_stamp(payload: Any) -> Optional[str]:
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if not isinstance(data, dict):
+        return None
+    return data.get("riotClientVersion") or data.get("version") or data.get("manifestId")
+
+
+def weapon_category(weapon: Dict[str, Any]) -> Optional[str]:
+    """Normalise ``EEquippableCategory::Sniper`` style categories to ``sniper``."""
+    raw = (weapon or {}).get("category") or ""
+    category = raw.split("::")[-1].strip().lower()
+    return category or None
+
+
+def _strip(kind: str, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    dropped = _DROPPED_FIELDS.get(kind, ())
+    return [{k: v for k, v in entry.items() if k not in dropped} for entry in entries if isinstance(entry, dict)]
+
+
+@dataclass
+class ContentSnapshot:
+    version: Optional[str]
+    fetched_at: Optional[str]
+    maps: List[Dict[str, Any]] = field(default_factory=list)
+    agents: List[Dict[str, Any]] = field(default_factory=list)
+    weapons: List[Dict[str, Any]] = field(default_factory=list)
+    maps_by_uuid: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    maps_by_url: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    agents_by_uuid: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    weapons_by_uuid: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    weapon_categories: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for mapa in self.maps:
+            if mapa.get("uuid"):
+                self.maps_by_uuid[mapa["uuid"].lower()] = mapa
+            if mapa.get("mapUrl"):
+                self.maps_by_url[mapa["mapUrl"]] = mapa
+        for agent in self.agents:
+            if agent.get("uuid"):
+                self.agents_by_uuid[agent["uuid"].lower()] = agent
+        for weapon in self.weapons:
+            if weapon.get("uuid"):
+                self.weapons_by_uuid[weapon["uuid"].lower()] = weapon
+                category = weapon_category(weapon)
+                if category:
+                    self.weapon_categories[weapon["uuid"].lower()] = category
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "fetched_at": self.fetched_at,
+            "maps": self.maps,
+            "agents": self.agents,
+            "weapons": self.weapons,
+        }
+
+
+class GameContentCatalog:
+    """Thread-safe, lazily loaded lookup tables for valorant-api.com content."""
+
+    def __init__(self, path: Path = CONTENT_FILE, *, refresh_interval: int = REFRESH_INTERVAL_SECONDS) -> None:
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ContentSnapshot] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._verify_on_start = False
+
+    # ------------------------------------------------------------------
+    # Loading & refreshing
+    # ------------------------------------------------------------------
+    def snapshot(self) -> ContentSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                loaded = self._load_from_disk()
+                if loaded is None:
+                    loaded = self._download()
+                    self._save(loaded)
+                else:
+                    # The disk copy may predate the current patch; verify soon.
+                    self._verify_on_start = True
+                self._snapshot = loaded
+        self.start_background_refresh()
+        return self._snapshot
+
+    def _load_from_disk(self) -> Optional[ContentSnapshot]:
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                raw = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(raw, dict):
+            return None
+        return ContentSnapshot(
+            version=raw.get("version"),
+            fetched_at=raw.get("fetched_at"),
+            maps=raw.get("maps") or [],
+            agents=raw.get("agents") or [],
+            weapons=raw.get("weapons") or [],
+        )
+
+    def _download(self, version: Optional[str] = None) -> ContentSnapshot:
+        if version is None:
+            version = _version_stamp(get_content_version())
+        return ContentSnapshot(
+            version=version,
+            fetched_at=datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            maps=_strip("maps", get_maps().get("data", [])),
+            agents=_strip("agents", get_agents().get("data", [])),
+            weapons=_strip("weapons", get_weapons().get("data", [])),
+        )
+
+    def _save(self, snapshot: ContentSnapshot) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(snapshot.to_dict(), handle)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """Re-download content if the patch version changed. Returns True on reload."""
+        latest = _version_stamp(get_content_version())
+        current = self._snapshot.version if self._snapshot else None
+        if not force and latest and latest == current:
+            return False
+        snapshot = self._download(latest)
+        with self._lock:
+            self._snapshot = snapshot
+            self._save(snapshot)
+        return True
+
+    def start_background_refresh(self) -> None:
+        """Spawn (once per process) a daemon thread that polls for new patches."""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name="content-catalog-refresh", daemon=True
+            )
+            self._refresher.start()
+
+    def stop_background_refresh(self) -> None:
+        self._stop.set()
+
+    def _refresh_loop(self) -> None:
+        if self._verify_on_start:
+            self._verify_on_start = False
+            try:
+                self.refresh()
+            except Exception:
+                pass
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the snapshot we have; try again next tick.
+                continue
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    @property
+    def version(self) -> Optional[str]:
+        return self.snapshot().version
+
+    def map_by_url(self, map_url: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().maps_by_url.get(map_url)
+
+    def map_by_uuid(self, uuid: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().maps_by_uuid.get((uuid or "").lower())
+
+    def agent(self, uuid: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().agents_by_uuid.get((uuid or "").lower())
+
+    def weapon(self, uuid: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().weapons_by_uuid.get((uuid or "").lower())
+
+    def weapon_categories(self) -> Dict[str, str]:
+        """Return the ``damageItem`` UUID (lower-case) -> category index."""
+        return self.snapshot().weapon_categories
+
+    def map_name(self, map_url: str) -> Optional[str]:
+        mapa = self.map_by_url(map_url)
+        return mapa.get("displayName") if mapa else None
+
+    def agent_name(self, uuid: str) -> Optional[str]:
+        agent = self.agent(uuid)
+        return agent.get("displayName") if agent else None
+
+    def weapon_name(self, uuid: str) -> Optional[str]:
+        weapon = self.weapon(uuid)
+        return weapon.get("displayName") if weapon else None
+
+    def remember(self, kind: str, entry: Dict[str, Any]) -> None:
+        """Insert a single entry fetched on a cache miss (e.g. mid-patch agent)."""
+        uuid = (entry or {}).get("uuid")
+        if not uuid:
+            return
+        snapshot = self.snapshot()
+        entry = _strip(kind, [entry])[0]
+        if kind == "agents":
+            snapshot.agents_by_uuid[uuid.lower()] = entry
+        elif kind == "weapons":
+            snapshot.weapons_by_uuid[uuid.lower()] = entry
+            category = weapon_category(entry)
+            if category:
+                snapshot.weapon_categories[uuid.lower()] = category
+        elif kind == "maps":
+            snapshot.maps_by_uuid[uuid.lower()] = entry
+            if entry.get("mapUrl"):
+                snapshot.maps_by_url[entry["mapUrl"]] = entry
+
+
+@lru_cache()
+def get_content_catalog() -> GameContentCatalog:
+    """Return the process-wide game content catalogue."""
+    return GameContentCatalog()
+
+
+__all__ = [
+    "CONTENT_FILE",
+    "ContentSnapshot",
+    "GameContentCatalog",
+    "get_content_catalog",
+    "weapon_category",
+]
@@ -33,6 +33,9 @@ from .riot_api import (
     get_maps,
     get_map_by_id,
 )
+from .content import get_content_catalog
+
+SNIPER_CATEGORY = "sniper"
 
 
 #GET BASIC INFO
@@ -432,6 +435,7 @@ def get_pistol_plants(data_matches, basic_info):
 
 def get_sniper_kills(map_name, side, list_ids, data_matches, basic_info, path):
     points = []
+    weapon_categories = get_content_catalog().weapon_categories()
     for match_id in list_ids:
         color = basic_info["matches"][match_id]["color"]
         data = data_matches[match_id]
@@ -440,8 +444,8 @@ def get_sniper_kills(map_name, side, list_ids, data_matches, basic_info, path):
                 for player in round["playerStats"]:
                     for kill in player["kills"]:
                         if kill["killer"] in basic_info["players"].keys() and kill["finishingDamage"]["damageType"] == "Weapon":
-                            weapon = get_weapon_by_puuid(kill["finishingDamage"]["damageItem"])["data"]["displayName"]
-                            if weapon in ["Operator", "Marshall", "Outlaw"]:
+                            weapon_id = (kill["finishingDamage"]["damageItem"] or "").lower()
+                            if weapon_categories.get(weapon_id) == SNIPER_CATEGORY:
                                 kill_list = {}
                                 kill_list["victim"] = {"id": kill["victim"], "loc": kill["victimLocation"]}
                                 for player in kill["playerLocations"]:
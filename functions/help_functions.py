@@ -3,12 +3,9 @@ import json
 import os
 import pickle
 import re
-from collections import defaultdict
 from datetime import timedelta
 from pathlib import Path
 
-import requests
-from bs4 import BeautifulSoup
 from flask import request, session
 from google.auth.transport.requests import Request
 from google.cloud import storage
@@ -18,6 +15,7 @@ from googleapiclient.discovery import build
 from hashlib import sha256
 
 from .config import PROJECT_ROOT, get_settings
+from .ranked_profile import build_ranked_profile, get_ranked_profile
 from .riot_api import (
     get_agent_by_puuid,
     get_map_by_id,
@@ -33,6 +31,7 @@ from .riot_api import (
     get_teams,
     get_weapon_by_puuid,
 )
+from .vlr_cache import get_vlr_cache
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = PROJECT_ROOT / "data"
@@ -83,34 +82,8 @@ def get_ranked_info(matchlist, puuid, data_player):
     return data
 
 def get_ranked_info_twoweeks(matchlist, puuid, data_player):
-    data = {"All": {}}
-    two_weeks_ago = datetime.datetime.today() - timedelta(weeks=3)
-    last_day = str(two_weeks_ago).split(" ")[0]
-    for match in matchlist["history"]:
-        # Parse match date and check if it's within the last 7 days
-        match_date_str = match["gameStartTime"].split("T")[0]
-        match_date = datetime.datetime.strptime(match_date_str, "%Y-%m-%d")
-        
-        if match_date_str.split("-")[0] != "2025" or match_date < two_weeks_ago:
-            break  # Exit loop as matches are sorted chronologically
-        
-        if match["queueId"] == "competitive":
-            match_data = get_match_by_match_id(match["matchId"], data_player["region_matchlist"])
-            map = get_map_by_id(match_data["matchInfo"]["mapId"])
-            if map not in data.keys():
-                data[map] = {}
-            for player in match_data["players"]:
-                if player["puuid"] == puuid:
-                    agent = get_agent_by_puuid(player["characterId"])["data"]["displayName"]
-                    if agent not in data[map].keys():
-                        data[map][agent] = 0
-                    if agent not in data["All"].keys():
-                        data["All"][agent] = 0
-                    data["All"][agent] += 1
-                    data[map][agent] += 1
-    for key in data:
-        data[key] = dict(sorted(data[key].items(), key=lambda item: item[1], reverse=True))
-    return data, last_day
+    """Agent picks per map over the last three weeks of competitive games."""
+    return build_ranked_profile(puuid, data_player["region_matchlist"], matchlist=matchlist)
 
 def convert_number_to_date(date_str):
     """Converts a date string into 'Month Day, Year' format."""
@@ -214,11 +187,9 @@ def help_scrape(team, events):
     team_ids = {"BBL": 397, "VIT": 2059, "NAVI": 4915, "FUT": 1184, "TH": 1001, "M8": 12694, "MKOI": 7035, "GX": 14419, "KC": 8877, "TL": 474, "FNC": 2593,
                 "SEN": 2, "MIBR": 7386, "BLG": 12010, "WOL": 13790, "GEN": 17, "PRX": 624, "G2": 11058, "XLG": 13581, "RRQ": 878, "100T": 120, "NRG": 1034, 
                 "EDG": 1120, "TEC": 14137, "T1": 14, "DRG": 11981, "DRX": 8185}
-    url = f"https://www.vlr.gg/team/matches/{team_ids[team]}"
-    matches = []
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    items = soup.find_all('a', class_='wf-card fc-flex m-item')
+    # Match list revalidated against vlr.gg; vetoes of known matches come from disk.
+    vlr = get_vlr_cache()
+    links = vlr.team_match_links(team_ids[team])
     expanded_events = []
     for e in events:
         if e == "2025-stage-1-all":
@@ -227,7 +198,8 @@ def help_scrape(team, events):
             expanded_events.extend(["2025-emea-stage-2", "2025-pacific-stage-2", "2025-americas-stage-2", "2025-china-stage-2"])
         else: expanded_events.append(e)
     
-    matches.extend([item['href'] for item in items if any(event in item['href'] for event in expanded_events)])
+    matches = [href for href in links if any(event in href for event in expanded_events)]
+    vetoes = vlr.match_vetoes(matches)
     pick_ban = {"Bind": [0,0,0,0],
                 "Split": [0,0,0,0],
                 "Fracture": [0,0,0,0],
@@ -241,12 +213,9 @@ def help_scrape(team, events):
                 "Corrode": [0,0,0,0]}
     overview = []
     for match in matches:
-        res = requests.get(f"https://www.vlr.gg{match}")
-        soup = BeautifulSoup(res.text, 'html.parser')
-        items = soup.find_all(class_="match-header-note")
-        items = [item.text for item in items]
-        items = items[0]
-        lista = items.split(";")
+        lista = vetoes.get(match)
+        if lista is None:
+            continue
         overview.append(lista)
         for i, map in enumerate(lista):
             if i < 6:
@@ -296,268 +265,6 @@ def save_strategy_to_file(map_name, comp_name, url):
     
     save_strategies(strategies)
 
-def process_scrim_data(scrim_data):
-    processed_data = []
-    last_date = None
-    for row in scrim_data:
-        # Skip rows that are completely empty
-        if not row:
-            continue
-        # If the date cell is not empty, update last_date
-        if row[0].strip():
-            last_date = row[0]
-        else:
-            # If the date cell is empty, set it to the last_date
-            row[0] = last_date
-        processed_data.append(row)
-    return processed_data
-
-def compute_win_stats(scrim_data):
-    stats = {}
-    for row in scrim_data:
-        # Skip rows that are headers or empty
-        if not row or row[0] in ['VOD LINK', "NO VOD"] or row[0] == 'DATE':
-            continue
-
-        # Assuming the row structure is: [DATE, SCRIM TYPE, OPPONENT, MAP, RESULT, ...]
-        try:
-            scrim_date = datetime.datetime.strptime(row[0], '%B %d, %Y').date()
-        except ValueError:
-            continue  # Skip rows with invalid date format
-
-        map_name = row[3]
-        result = row[4].upper()
-        def_won = int(row[6])
-        atk_won = int(row[7])
-        def_pistol = int(row[8])
-        atk_pistol = int(row[9])
-        if map_name not in stats:
-            stats[map_name] = {'games': 0, 'wins': 0, 'draws': 0, 'losses': 0, 'def_won': 0, "def_played": 0, 'atk_won': 0, "atk_played": 0, 'def_pistol_won': 0, 'atk_pistol_won': 0}
-        stats[map_name]['games'] += 1
-        if result == 'WON':
-            stats[map_name]['wins'] += 1
-        elif result == 'DRAW':
-            stats[map_name]['draws'] += 1
-        elif result == 'LOST':
-            stats[map_name]['losses'] += 1
-        stats[map_name]['def_won'] += def_won
-        stats[map_name]['def_played'] += 12
-        stats[map_name]['atk_won'] += atk_won
-        stats[map_name]['atk_played'] += 12
-        stats[map_name]['def_pistol_won'] += def_pistol
-        stats[map_name]['atk_pistol_won'] += atk_pistol
-
-    win_stats = []
-    for map_name, data in stats.items():
-        win_rate = round((data['wins'] / data['games']) * 100) if data['games'] > 0 else 0
-        def_win_rate = round((data['def_won'] / data['def_played']) * 100) if data['def_played'] > 0 else 0
-        atk_win_rate = round((data['atk_won'] / data['atk_played']) * 100) if data['atk_played'] > 0 else 0
-        def_pistol_rate = round((data['def_pistol_won'] / data['games']) * 100) if data['games'] > 0 else 0
-        atk_pistol_rate = round((data['atk_pistol_won'] / data['games']) * 100) if data['games'] > 0 else 0
-
-        win_stats.append({
-            'map': map_name,
-            'games': data['games'],
-            'wins': data['wins'],
-            'draws': data['draws'],
-            'losses': data['losses'],
-            'win_rate': win_rate,
-            "def_winrate": def_win_rate,
-            "atk_winrate": atk_win_rate,
-            "def_pistol": def_pistol_rate,
-            "atk_pistol": atk_pistol_rate
-        })
-    return win_stats
-
-def get_agent_winrates(scrim_data):
-    columns = ['DATE', 'SCRIM TYPE', 'OPPONENT', 'MAP', 'RESULT', 'TOTAL SCORE', 
-               'DEFENSE', 'ATTACK', 'DEF', 'ATK', 'ENEMY TEAM COMP']
-    
-    # Convert each row (list) into a dictionary.
-    rows = []
-    for row in scrim_data:
-        # Use zip to map columns to values.
-        row_dict = {col: value for col, value in zip(columns, row)}
-        rows.append(row_dict)
-    
-    # Filter out rows that have missing MAP or RESULT, or where MAP is empty.
-    filtered = [
-        row for row in rows 
-        if row.get('MAP') is not None and row.get('RESULT') is not None and row.get('MAP') != '' and row.get('MAP') != 'MAP'
-    ]
-    
-    # Explode the "ENEMY TEAM COMP" column: split by ', ' and create one row per agent.
-    exploded_rows = []
-    for row in filtered:
-        comp = row.get('ENEMY TEAM COMP', '')
-        # Split the composition into a list of agents.
-        agents = comp.split(', ') if comp else []
-        for agent in agents:
-            new_row = row.copy()
-            new_row['ENEMY TEAM COMP'] = agent
-            exploded_rows.append(new_row)
-    
-    # Group the data by (MAP, ENEMY TEAM COMP)
-    groups = {}
-    for row in exploded_rows:
-        key = (row['MAP'], row['ENEMY TEAM COMP'])
-        if key not in groups:
-            groups[key] = {'total_games': 0, 'wins': 0}
-        groups[key]['total_games'] += 1
-        if row['RESULT'] == 'WON':
-            groups[key]['wins'] += 1
-    
-    # Build a list of dictionaries with the computed win rates.
-    results = []
-    for (map_name, agent), counts in groups.items():
-        total = counts['total_games']
-        wins = counts['wins']
-        win_rate = (wins / total) * 100 if total > 0 else 0
-        results.append({
-            'MAP': map_name,
-            'ENEMY TEAM COMP': agent,
-            'total_games': total,
-            'wins': wins,
-            'win_rate': win_rate
-        })
-    
-    # Sort results: first by MAP (alphabetically) then by win_rate in ascending order.
-    results = sorted(results, key=lambda x: (x['MAP'], x['win_rate']))
-    
-    return results
-
-def get_scrim_teams(scrim_data):
-    teams = defaultdict(list)
-    for row in scrim_data:
-        if not row or row[0] in ['VOD LINK', "NO VOD"] or row[0] == 'DATE':
-            continue
-        try:
-            scrim_date = datetime.datetime.strptime(row[0], '%B %d, %Y').date()
-        except ValueError:
-            continue  # Skip rows with invalid date format
-
-        team = row[2]
-        if team == "KarmineCorp" or team == "Karmine Corp":
-            team = "KC"
-        if team not in ["KOI", "KC", "BBL", "GIANTX", "GentleMates", "FUT", "Liquid"]:
-            continue
-
-        map_name = row[3]
-        result = row[4].upper()
-        comp = row[10].split(", ")
-        comp.sort()
-
-        if team not in teams:
-            teams[team] = {'maps': {}}
-        if map_name not in teams[team]['maps']:
-            teams[team]['maps'][map_name] = {"comps": {}}
-        if tuple(comp) not in teams[team]['maps'][map_name]["comps"]:
-            teams[team]['maps'][map_name]["comps"][tuple(comp)] = {"games": 0, "wins": 0, "dates": []}
-        teams[team]['maps'][map_name]["comps"][tuple(comp)]["games"] += 1
-        teams[team]['maps'][map_name]["comps"][tuple(comp)]["dates"].append(row[0])
-        if result == 'WON':
-            teams[team]['maps'][map_name]["comps"][tuple(comp)]["wins"] += 1
-    return teams
-
-
-def compute_head_to_head_summary(scrim_data):
-    """Aggregate head-to-head results by opponent (and per-map breakdown).
-    Expects rows shaped like:
-    [DATE, SCRIM TYPE, OPPONENT, MAP, RESULT, TOTAL SCORE, DEFENSE, ATTACK, DEF PISTOL, ATK PISTOL, ENEMY TEAM COMP]
-    Returns a list of dicts:
-      {
-        'opponent': str,
-        'games': int,
-        'wins': int,
-        'wr': int,  # percentage
-        'last_played': 'Month D, YYYY',
-        'last_sort': 'YYYY-MM-DD',
-        'maps': [ {'map': str, 'games': int, 'wins': int, 'wr': int}, ... ]
-      }
-    """
-    by_opp = {}
-    for row in scrim_data:
-        if not row or row[0] in ['VOD LINK', 'DATE']:
-            continue
-        try:
-            d = datetime.datetime.strptime(row[0], '%B %d, %Y').date()
-        except Exception:
-            continue
-
-        opponent = (row[2] or '').strip()
-        if opponent in ("KarmineCorp", "Karmine Corp"):
-            opponent = "KC"
-        mapa = (row[3] or '').strip()
-        result = (row[4] or '').strip().upper()
-
-        if not opponent or not mapa:
-            continue
-
-        if opponent not in by_opp:
-            by_opp[opponent] = {
-                'games': 0,
-                'wins': 0,
-                'last_dt': d,
-                'maps': {},
-                'events': []  # list of {'dt': date, 'map': str, 'comp': str}
-            }
-        rec = by_opp[opponent]
-        rec['games'] += 1
-        if result == 'WON':
-            rec['wins'] += 1
-        if d > rec['last_dt']:
-            rec['last_dt'] = d
-
-        if mapa not in rec['maps']:
-            rec['maps'][mapa] = {'games': 0, 'wins': 0}
-        rec['maps'][mapa]['games'] += 1
-        if result == 'WON':
-            rec['maps'][mapa]['wins'] += 1
-
-        # capture composition and date for detailed listing
-        comp = (row[10] if len(row) > 10 else '') or ''
-        rec['events'].append({'dt': d, 'map': mapa, 'comp': comp})
-
-    summary = []
-    for opp, rec in by_opp.items():
-        games = rec['games']
-        wins = rec['wins']
-        wr = round((wins / games) * 100) if games else 0
-        last_dt = rec['last_dt']
-        maps_list = []
-        for m, md in rec['maps'].items():
-            mg = md['games']
-            mw = md['wins']
-            mwr = round((mw / mg) * 100) if mg else 0
-            maps_list.append({'map': m, 'games': mg, 'wins': mw, 'wr': mwr})
-        maps_list.sort(key=lambda x: (-x['games'], x['map']))
-        # sort events by date desc and format
-        evs = sorted(rec['events'], key=lambda e: e['dt'], reverse=True)
-        events_fmt = [
-            {
-                'date': e['dt'].strftime('%B %d, %Y'),
-                'date_sort': e['dt'].isoformat(),
-                'map': e['map'],
-                'comp': e['comp']
-            }
-            for e in evs
-        ]
-
-        summary.append({
-            'opponent': opp,
-            'games': games,
-            'wins': wins,
-            'wr': wr,
-            'last_played': last_dt.strftime('%B %d, %Y'),
-            'last_sort': last_dt.isoformat(),
-            'maps': maps_list,
-            'events': events_fmt
-        })
-
-    summary.sort(key=lambda x: (-x['games'], x['opponent']))
-    return summary
-
-
 def load_map_rankings():
     """Return stored map rankings sorted by creation timestamp ascending."""
     if not MAP_RANKINGS_FILE.exists():
@@ -0,0 +1,134 @@
+"""Shared, connection-pooled HTTP client for outbound API calls.
+
+Every module that talks to valolytics, valorant-api.com or vlr.gg should go
+through :func:`get_http_client` so TCP/TLS connections are reused instead of
+being re-established on every request.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; ValoHub/1.0; +https://valohub)"
+
+
+def _int_env(var_name: str, default: int) -> int:
+    value = os.getenv(var_name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        return default
+    return parsed if parsed > 0 else default
+
+
+# Number of distinct hosts kept in the pool, and keep-alive sockets per host.
+DEFAULT_POOL_CONNECTIONS = _int_env("HTTP_POOL_CONNECTIONS", 8)
+DEFAULT_POOL_MAXSIZE = _int_env("HTTP_POOL_MAXSIZE", 16)
+
+
+class HttpClient:
+    """Thread-safe wrapper around a single pooled ``HTTPAdapter``.
+
+    Each thread gets its own ``requests.Session`` (so cookie jars and default
+    headers are never mutated concurrently), but all of them mount the same
+    adapter and therefore share one urllib3 pool of keep-alive connections
+    per host. The pool is rebuilt after ``fork()`` so RQ work-horses never
+    reuse sockets inherited from the parent worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.user_agent = user_agent
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._adapter = self._build_adapter()
+        self._local = threading.local()
+
+    def _build_adapter(self) -> HTTPAdapter:
+        # pool_block=True makes callers wait for a free socket instead of
+        # opening throwaway connections once the per-host pool is exhausted.
+        return HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=True,
+        )
+
+    def _reset_after_fork(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._adapter = self._build_adapter()
+            self._local = threading.local()
+
+    def session(self) -> requests.Session:
+        """Return the calling thread's session bound to the shared pool."""
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            session.headers.update(
+                {
+                    "user-agent": self.user_agent,
+                    "connection": "keep-alive",
+                }
+            )
+            self._local.session = session
+        return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        return self.session().request(method, url, headers=headers, timeout=timeout, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        """Drop every pooled connection (mainly for shutdown hooks and tests)."""
+        with self._lock:
+            self._adapter.close()
+            self._adapter = self._build_adapter()
+            self._local = threading.local()
+
+
+@lru_cache()
+def get_http_client() -> HttpClient:
+    """Return the process-wide pooled HTTP client."""
+    return HttpClient()
+
+
+__all__ = [
+    "DEFAULT_POOL_CONNECTIONS",
+    "DEFAULT_POOL_MAXSIZE",
+    "DEFAULT_USER_AGENT",
+    "HttpClient",
+    "get_http_client",
+]
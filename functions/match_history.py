@@ -0,0 +1,346 @@
+"""Local per-player match history fed incrementally from matchlists.
+
+Each tracked puuid has a sync cursor (the newest ``matchId`` and
+``gameStartTime`` already stored). A refresh walks the freshly downloaded
+matchlist from the top and stops at the cursor, so only new games are
+inserted; aggregations then query the ``match_history`` table instead of
+re-walking the full upstream history.
+
+The same database keeps the per-player daily queue counters shown on the
+rankeds page, written with upserts so a refresh only touches the days that
+received new games, and a compact per-match extract of every player's
+kills/deaths/vlrRating2 so KDA can be re-aggregated without the payloads.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import PROJECT_ROOT
+
+HISTORY_FILE = PROJECT_ROOT / "data" / "rankeds" / "history.sqlite3"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS match_history (
+        puuid TEXT NOT NULL,
+        match_id TEXT NOT NULL,
+        game_start_time TEXT NOT NULL,
+        game_date TEXT NOT NULL,
+        queue_id TEXT,
+        PRIMARY KEY (puuid, match_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS match_history_by_date ON match_history (puuid, game_date)",
+    """
+    CREATE TABLE IF NOT EXISTS sync_cursors (
+        puuid TEXT PRIMARY KEY,
+        newest_match_id TEXT NOT NULL,
+        newest_game_start TEXT NOT NULL,
+        synced_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_counts (
+        player TEXT NOT NULL,
+        day TEXT NOT NULL,
+        queue_id TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (player, day, queue_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS player_match_stats (
+        match_id TEXT NOT NULL,
+        puuid TEXT NOT NULL,
+        kills INTEGER NOT NULL,
+        deaths INTEGER NOT NULL,
+        vlr_rating2 REAL NOT NULL,
+        PRIMARY KEY (puuid, match_id)
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS extracted_matches (match_id TEXT PRIMARY KEY)",
+    "CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+
+class MatchHistoryStore:
+    """SQLite-backed match history with per-puuid incremental sync cursors."""
+
+    def __init__(self, path: Path = HISTORY_FILE) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+    def cursor(self, puuid: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT newest_match_id, newest_game_start, synced_at FROM sync_cursors WHERE puuid = ?",
+            (puuid,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def sync(self, puuid: str, matchlist: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Merge the entries of ``matchlist`` newer than the cursor. Returns them.
+
+        ``matchlist["history"]`` is expected newest-first, as the valolytics
+        matchlist endpoint returns it.
+        """
+        cursor = self.cursor(puuid)
+        newest_id = cursor["newest_match_id"] if cursor else None
+        newest_start = cursor["newest_game_start"] if cursor else None
+
+        fresh: List[Dict[str, Any]] = []
+        for match in (matchlist or {}).get("history", []):
+            match_id = match.get("matchId")
+            start = match.get("gameStartTime") or ""
+            if not match_id or "T" not in start:
+                continue
+            if match_id == newest_id or (newest_start and start < newest_start):
+                break
+            fresh.append(
+                {
+                    "match_id": match_id,
+                    "game_start_time": start,
+                    "game_date": start.split("T")[0],
+                    "queue_id": match.get("queueId"),
+                }
+            )
+
+        if not fresh:
+            return fresh
+
+        top = max(fresh, key=lambda entry: entry["game_start_time"])
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO match_history (puuid, match_id, game_start_time, game_date, queue_id) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (puuid, e["match_id"], e["game_start_time"], e["game_date"], e["queue_id"])
+                    for e in fresh
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_cursors (puuid, newest_match_id, newest_game_start, synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    puuid,
+                    top["match_id"],
+                    top["game_start_time"],
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                ),
+            )
+            self._bump_revision(conn)
+        return fresh
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def entries(
+        self,
+        puuid: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        *,
+        queues: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return stored matches for ``puuid`` between the dates, newest first."""
+        sql = (
+            "SELECT match_id, game_start_time, game_date, queue_id FROM match_history "
+            "WHERE puuid = ? AND game_date BETWEEN ? AND ?"
+        )
+        params: List[Any] = [puuid, start_date.isoformat(), end_date.isoformat()]
+        if queues is not None:
+            queues = list(queues)
+            sql += f" AND queue_id IN ({','.join('?' for _ in queues)})"
+            params.extend(queues)
+        sql += " ORDER BY game_start_time DESC"
+        return [dict(row) for row in self._connection().execute(sql, params)]
+
+    def daily_counts(
+        self,
+        puuid: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        queues: Iterable[str],
+    ) -> Dict[str, Dict[str, int]]:
+        """Return ``{day: {queue: count}}`` for the given queues and date range."""
+        queues = list(queues)
+        rows = self._connection().execute(
+            "SELECT game_date, queue_id, COUNT(*) AS n FROM match_history "
+            "WHERE puuid = ? AND game_date BETWEEN ? AND ? "
+            f"AND queue_id IN ({','.join('?' for _ in queues)}) "
+            "GROUP BY game_date, queue_id ORDER BY game_date",
+            [puuid, start_date.isoformat(), end_date.isoformat(), *queues],
+        )
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            day = counts.setdefault(row["game_date"], {queue: 0 for queue in queues})
+            day[row["queue_id"]] = row["n"]
+        return counts
+
+    # ------------------------------------------------------------------
+    # Per-player daily counters
+    # ------------------------------------------------------------------
+    def upsert_daily_counts(
+        self,
+        player: str,
+        counts: Dict[str, Dict[str, int]],
+        *,
+        overwrite: bool = True,
+    ) -> None:
+        """Write ``{day: {queue: count}}`` rows for ``player``.
+
+        Existing rows are replaced when ``overwrite`` is set and kept otherwise.
+        """
+        conflict = "DO UPDATE SET count = excluded.count" if overwrite else "DO NOTHING"
+        rows = [
+            (player, day, queue, int(n))
+            for day, per_queue in counts.items()
+            for queue, n in per_queue.items()
+        ]
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO daily_counts (player, day, queue_id, count) VALUES (?, ?, ?, ?) "
+                f"ON CONFLICT (player, day, queue_id) {conflict}",
+                rows,
+            )
+            if rows:
+                self._bump_revision(conn)
+
+    def stored_daily_counts(
+        self,
+        player: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        queues: Iterable[str],
+    ) -> Dict[str, Dict[str, int]]:
+        """Return the stored ``{day: {queue: count}}`` rows for ``player``."""
+        queues = list(queues)
+        rows = self._connection().execute(
+            "SELECT day, queue_id, count FROM daily_counts "
+            "WHERE player = ? AND day BETWEEN ? AND ? "
+            f"AND queue_id IN ({','.join('?' for _ in queues)}) ORDER BY day",
+            [player, start_date.isoformat(), end_date.isoformat(), *queues],
+        )
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            counts.setdefault(row["day"], {queue: 0 for queue in queues})[row["queue_id"]] = row["count"]
+        return counts
+
+    # ------------------------------------------------------------------
+    # Per-match player stat extracts
+    # ------------------------------------------------------------------
+    def missing_stat_extracts(self, match_ids: Iterable[str]) -> List[str]:
+        """Return the ids in ``match_ids`` that have no stored extract yet."""
+        conn = self._connection()
+        missing = []
+        for match_id in dict.fromkeys(match_ids):
+            row = conn.execute("SELECT 1 FROM extracted_matches WHERE match_id = ?", (match_id,)).fetchone()
+            if row is None:
+                missing.append(match_id)
+        return missing
+
+    def store_stat_extract(self, match_id: str, payload: Dict[str, Any]) -> int:
+        """Keep kills/deaths/vlrRating2 for every player of a match payload."""
+        rows = []
+        for player in payload.get("players") or []:
+            stats = player.get("stats") or {}
+            if not player.get("puuid"):
+                continue
+            rows.append(
+                (
+                    match_id,
+                    player["puuid"],
+                    stats.get("kills") or 0,
+                    stats.get("deaths") or 0,
+                    stats.get("vlrRating2") or 0.0,
+                )
+            )
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO player_match_stats (match_id, puuid, kills, deaths, vlr_rating2) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("INSERT OR IGNORE INTO extracted_matches (match_id) VALUES (?)", (match_id,))
+        return len(rows)
+
+    def kda_totals(
+        self,
+        puuid: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        *,
+        exclude_queues: Iterable[str] = (),
+    ) -> List[float]:
+        """Return ``[kills, deaths, vlrRating2 sum]`` over the puuid's stored matches."""
+        exclude_queues = list(exclude_queues)
+        sql = (
+            "SELECT COALESCE(SUM(s.kills), 0), COALESCE(SUM(s.deaths), 0), COALESCE(SUM(s.vlr_rating2), 0) "
+            "FROM match_history h JOIN player_match_stats s "
+            "ON s.puuid = h.puuid AND s.match_id = h.match_id "
+            "WHERE h.puuid = ? AND h.game_date BETWEEN ? AND ?"
+        )
+        params: List[Any] = [puuid, start_date.isoformat(), end_date.isoformat()]
+        if exclude_queues:
+            sql += f" AND COALESCE(h.queue_id, '') NOT IN ({','.join('?' for _ in exclude_queues)})"
+            params.extend(exclude_queues)
+        return list(self._connection().execute(sql, params).fetchone())
+
+    def revision(self) -> int:
+        """Counter bumped by every write to the history or the daily counters."""
+        value = self.get_meta("revision")
+        return int(value) if value else 0
+
+    @staticmethod
+    def _bump_revision(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "INSERT INTO store_meta (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (key, value))
+
+
+@lru_cache()
+def get_match_history_store() -> MatchHistoryStore:
+    """Return the process-wide match history store."""
+    return MatchHistoryStore()
+
+
+__all__ = ["HISTORY_FILE", "MatchHistoryStore", "get_match_history_store"]
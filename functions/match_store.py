@@ -0,0 +1,160 @@
+"""Persistent on-disk archive of finished match payloads.
+
+Match payloads never change once a game is over, so each one is stored once
+as gzip-compressed JSON under ``data/matches/<region>/<shard>/<matchId>.json.gz``
+(``shard`` being the first two characters of the id) and recorded in a small
+SQLite index. ``riot_api.get_match_by_match_id`` consults the archive before
+going to the network.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import PROJECT_ROOT
+
+MATCHES_DIR = PROJECT_ROOT / "data" / "matches"
+INDEX_FILE = MATCHES_DIR / "index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_id TEXT NOT NULL,
+    region TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    game_start_millis INTEGER,
+    map_id TEXT,
+    stored_at TEXT NOT NULL,
+    PRIMARY KEY (match_id, region)
+)
+"""
+
+
+def _is_complete(payload: Any) -> bool:
+    """Only archive matches that are over; live ones can still change."""
+    if not isinstance(payload, dict) or not payload.get("roundResults"):
+        return False
+    info = payload.get("matchInfo") or {}
+    return info.get("isCompleted", True) is not False
+
+
+class MatchArchive:
+    """Content-addressed store of match payloads keyed by ``(matchId, region)``."""
+
+    def __init__(self, root: Path = MATCHES_DIR, index_path: Optional[Path] = None) -> None:
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else self.root / INDEX_FILE.name
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    # ------------------------------------------------------------------
+    # Index helpers
+    # ------------------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.index_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def path_for(self, match_id: str, region: str) -> Path:
+        match_id = match_id.lower()
+        return self.root / region / match_id[:2] / f"{match_id}.json.gz"
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def contains(self, match_id: str, region: str) -> bool:
+        row = self._connection().execute(
+            "SELECT path FROM matches WHERE match_id = ? AND region = ?",
+            (match_id.lower(), region),
+        ).fetchone()
+        return bool(row) and (self.root / row[0]).exists()
+
+    def missing(self, match_ids: Iterable[str], region: str) -> List[str]:
+        """Return the ids from ``match_ids`` that are not archived yet, in order."""
+        return [match_id for match_id in match_ids if not self.contains(match_id, region)]
+
+    def get(self, match_id: str, region: str) -> Optional[Dict[str, Any]]:
+        path = self.path_for(match_id, region)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, json.JSONDecodeError):
+            # Truncated or corrupt entry: forget it so it is downloaded again.
+            self.discard(match_id, region)
+            return None
+
+    def put(self, match_id: str, region: str, payload: Dict[str, Any]) -> bool:
+        """Archive ``payload`` if the match is finished. Returns True when stored."""
+        if not _is_complete(payload):
+            return False
+        path = self.path_for(match_id, region)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+        info = payload.get("matchInfo") or {}
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO matches "
+            "(match_id, region, path, size, game_start_millis, map_id, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                match_id.lower(),
+                region,
+                str(path.relative_to(self.root)),
+                path.stat().st_size,
+                info.get("gameStartMillis"),
+                info.get("mapId"),
+                datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            ),
+        )
+        conn.commit()
+        return True
+
+    def discard(self, match_id: str, region: str) -> None:
+        conn = self._connection()
+        conn.execute(
+            "DELETE FROM matches WHERE match_id = ? AND region = ?",
+            (match_id.lower(), region),
+        )
+        conn.commit()
+        try:
+            self.path_for(match_id, region).unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        count, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM matches"
+        ).fetchone()
+        return {"matches": count, "bytes": size}
+
+
+@lru_cache()
+def get_match_archive() -> MatchArchive:
+    """Return the process-wide match archive."""
+    return MatchArchive()
+
+
+__all__ = ["MATCHES_DIR", "MatchArchive", "get_match_archive"]
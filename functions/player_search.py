@@ -0,0 +1,124 @@
+"""N-gram index over ``opponents.json`` names for search-as-you-type.
+
+Every lowercased name is split into its 1-, 2- and 3-grams. A query of up to
+three characters is a single posting-list lookup; longer queries intersect
+the postings of their trigrams (smallest first) and confirm the candidates
+with a substring check. Matches are ranked (exact name, name prefix, word
+prefix, anywhere; then shorter names first) through a heap that only keeps
+the top ``limit``. The index reloads itself when the JSON file's mtime changes.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import PROJECT_ROOT
+
+OPPONENTS_FILE = PROJECT_ROOT / "static" / "opponents.json"
+MAX_GRAM = 3
+DEFAULT_LIMIT = 15
+
+
+def _grams(text: str, n: int) -> Set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class PlayerNameIndex:
+    """Substring search over a fixed list of names."""
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self.names: List[str] = list(names)
+        self._lowered: List[str] = [name.lower() for name in self.names]
+        self._postings: Dict[str, Set[int]] = {}
+        for idx, lowered in enumerate(self._lowered):
+            for n in range(1, MAX_GRAM + 1):
+                for gram in _grams(lowered, n):
+                    self._postings.setdefault(gram, set()).add(idx)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _candidates(self, query: str) -> Set[int]:
+        if len(query) <= MAX_GRAM:
+            return self._postings.get(query, set())
+        postings = sorted(
+            (self._postings.get(gram, set()) for gram in _grams(query, MAX_GRAM)),
+            key=len,
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return {idx for idx in candidates if query in self._lowered[idx]}
+
+    def _rank(self, idx: int, query: str) -> Tuple[int, int, str]:
+        lowered = self._lowered[idx]
+        if lowered == query:
+            tier = 0
+        elif lowered.startswith(query):
+            tier = 1
+        elif any(word.startswith(query) for word in lowered.split()):
+            tier = 2
+        else:
+            tier = 3
+        return tier, len(lowered), lowered
+
+    def search(self, query: str, limit: Optional[int] = DEFAULT_LIMIT) -> List[str]:
+        """Return the best names containing ``query`` (case-insensitive)."""
+        query = query.lower()
+        if not query:
+            return []
+        candidates = self._candidates(query)
+        if limit is None:
+            ranked = sorted(candidates, key=lambda idx: self._rank(idx, query))
+        else:
+            # Short queries match most of the index: keep a top-``limit`` heap instead of sorting it all.
+            ranked = heapq.nsmallest(limit, candidates, key=lambda idx: self._rank(idx, query))
+        return [self.names[idx] for idx in ranked]
+
+
+class OpponentsIndex:
+    """:class:`PlayerNameIndex` over a JSON file, rebuilt when the file changes."""
+
+    def __init__(self, path: Path = OPPONENTS_FILE) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._index = PlayerNameIndex(())
+
+    def index(self) -> PlayerNameIndex:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return self._index
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with self.path.open("r", encoding="utf-8") as handle:
+                        self._index = PlayerNameIndex(json.load(handle))
+                    self._mtime = mtime
+        return self._index
+
+    def search(self, query: str, limit: Optional[int] = DEFAULT_LIMIT) -> List[str]:
+        return self.index().search(query, limit)
+
+
+@lru_cache()
+def get_opponents_index() -> OpponentsIndex:
+    """Return the process-wide index over ``static/opponents.json``."""
+    return OpponentsIndex()
+
+
+__all__ = [
+    "DEFAULT_LIMIT",
+    "OPPONENTS_FILE",
+    "OpponentsIndex",
+    "PlayerNameIndex",
+    "get_opponents_index",
+]
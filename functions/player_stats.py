@@ -0,0 +1,399 @@
+"""Server-side queries over the pro player stats dataset behind ``/stats``.
+
+``static/dataset_players.json`` is served from its memory-mapped columnar copy
+(:mod:`functions.columnar`). Filters become NumPy masks: token filters are
+matched against the (small) category dictionaries of team/name/agent/event and
+turned into code lookups, free-text terms are matched per column, regions go
+through a per-team lookup and minimum rounds is a comparison. Selecting
+several events merges each team/player/agent across them with ``bincount``.
+Only the requested page is decoded back into row dicts.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .columnar import DATASETS, ColumnarDataset, load_columnar
+
+PLAYERS_DATASET = DATASETS["players"]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+REGIONS = ("EMEA", "Americas", "APAC")
+COMBINED_EVENT = "Selected"
+
+# Team tag -> region (approximate; APAC includes CN/JP/KR/SEA).
+TEAM_REGIONS: Dict[str, str] = {
+    **dict.fromkeys(
+        ("100T", "C9", "SEN", "EG", "NRG", "LOUD", "MIBR", "KRU", "LEV", "FUR", "G2"), "Americas"
+    ),
+    **dict.fromkeys(
+        ("TL", "VIT", "TH", "FNC", "BBL", "FUT", "NAVI", "KC", "M8", "APK", "MKOI", "GX"), "EMEA"
+    ),
+    **dict.fromkeys(
+        (
+            "DRX", "DFM", "EDG", "BLG", "ZETA", "T1", "GEN", "RRQ", "PRX", "TLN", "GE", "TS",
+            "WOL", "XLG", "BME", "TEC", "NS", "2G",
+        ),
+        "APAC",
+    ),
+}
+
+_FILTER_COLUMNS = ("Team", "Name", "Agent", "Event")
+_GROUP_COLUMNS = ("Team", "Name", "Agent")
+# Counting columns summed when several events are merged.
+_SUM_COLUMNS = (
+    "Maps", "Rounds", "Kills", "Deaths", "Assists", "Non-damaging A", "Damaging A",
+    "First Kills", "First Deaths", "True FK", "True FD", "RvsR Kills", "RvsR Deaths",
+    "OP Kills", "MK", "Aces",
+)
+# Per-round averages merged as round-weighted means.
+_WEIGHTED_COLUMNS = ("ACS", "ADR", "OP Usage%")
+
+Row = Dict[str, Any]
+
+
+def team_region(team: Any) -> Optional[str]:
+    return TEAM_REGIONS.get(str(team or "").strip().upper())
+
+
+def _clean_tokens(values: Sequence[Any]) -> Tuple[str, ...]:
+    return tuple(token for token in (str(v).strip().lower() for v in values) if token)
+
+
+def _event_matches(event: str, token: str) -> bool:
+    # "all" only selects the pre-aggregated rows, not e.g. "EWC EMEA Qualifiers (All)".
+    return event == "all" if token == "all" else token in event
+
+
+def _number_text(value: float) -> str:
+    # Integral floats print like the browser used to ("12", not "12.0").
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+@dataclass(frozen=True)
+class StatsQuery:
+    """Filters, sort and page requested by the stats table."""
+
+    teams: Tuple[str, ...] = ()
+    names: Tuple[str, ...] = ()
+    agents: Tuple[str, ...] = ()
+    events: Tuple[str, ...] = ()
+    regions: Tuple[str, ...] = REGIONS
+    min_rounds: int = 0
+    text: str = ""
+    sort: Optional[str] = None
+    descending: bool = False
+    page: int = 1
+    page_size: int = DEFAULT_PAGE_SIZE
+
+    @classmethod
+    def from_args(cls, args: Any) -> "StatsQuery":
+        """Build a query from request args (a Werkzeug ``MultiDict``).
+
+        List filters accept repeated keys or comma separated values. Raises
+        ``ValueError`` for malformed numbers or unknown regions.
+        """
+
+        def tokens(key: str) -> Tuple[str, ...]:
+            raw = [part for value in args.getlist(key) for part in str(value).split(",")]
+            return _clean_tokens(raw)
+
+        regions = REGIONS
+        if "region" in args:
+            lookup = {region.lower(): region for region in REGIONS}
+            try:
+                regions = tuple(lookup[token] for token in tokens("region"))
+            except KeyError as exc:
+                raise ValueError(f"Unknown region {exc.args[0]!r}.") from None
+
+        return cls(
+            teams=tokens("team"),
+            names=tokens("name"),
+            agents=tokens("agent"),
+            events=tokens("event"),
+            regions=regions,
+            min_rounds=max(0, int(args.get("min_rounds") or 0)),
+            text=str(args.get("q") or "").strip().lower(),
+            sort=args.get("sort") or None,
+            descending=str(args.get("dir", "asc")).lower() == "desc",
+            page=max(1, int(args.get("page") or 1)),
+            page_size=min(MAX_PAGE_SIZE, max(1, int(args.get("page_size") or DEFAULT_PAGE_SIZE))),
+        )
+
+
+@dataclass
+class StatsPage:
+    headers: List[str]
+    numeric_columns: List[str]
+    total: int
+    page: int
+    page_size: int
+    pages: int
+    rows: List[Row] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "headers": self.headers,
+            "numeric_columns": self.numeric_columns,
+            "total": self.total,
+            "page": self.page,
+            "page_size": self.page_size,
+            "pages": self.pages,
+            "rows": self.rows,
+        }
+
+
+# ----------------------------------------------------------------------
+# Column helpers
+# ----------------------------------------------------------------------
+def _lowered(frame: ColumnarDataset, header: str) -> List[str]:
+    return [category.lower() for category in frame.categories(header) or ()]
+
+
+def _codes_where(frame: ColumnarDataset, header: str, predicate) -> np.ndarray:
+    """Mask of rows whose category (lowercased) satisfies ``predicate``."""
+    if header not in frame:
+        return np.zeros(len(frame), dtype=bool)
+    hits = [code for code, value in enumerate(_lowered(frame, header)) if predicate(value)]
+    return np.isin(frame.column(header), hits)
+
+
+def _floats(frame: ColumnarDataset, header: str) -> np.ndarray:
+    """Numeric column as float64 with blanks as 0 (zeros if the column is missing)."""
+    if header not in frame or not frame.is_numeric(header):
+        return np.zeros(len(frame))
+    return np.nan_to_num(frame.column(header).astype(np.float64), nan=0.0)
+
+
+def _numeric_vocabulary(frame: ColumnarDataset) -> Dict[str, Tuple[List[Any], List[str]]]:
+    """Distinct non-blank values of every numeric column and their display text."""
+    vocabulary = {}
+    for header in frame.numeric_columns:
+        column = frame.column(header)
+        values = np.unique(column[~np.isnan(column)] if column.dtype.kind == "f" else column).tolist()
+        vocabulary[header] = (values, [_number_text(value) for value in values])
+    return vocabulary
+
+
+def _text_mask(
+    frame: ColumnarDataset, term: str, vocabulary: Dict[str, Tuple[List[Any], List[str]]]
+) -> np.ndarray:
+    """Rows where any column's text contains ``term``."""
+    mask = np.zeros(len(frame), dtype=bool)
+    for header in frame.headers:
+        if header in vocabulary:
+            values, texts = vocabulary[header]
+            hits = [value for value, text in zip(values, texts) if term in text]
+            if hits:
+                mask |= np.isin(frame.column(header), hits)
+        else:
+            mask |= _codes_where(frame, header, lambda value: term in value)
+    return mask
+
+
+def _sort_keys(frame: ColumnarDataset, header: str, rows: np.ndarray) -> np.ndarray:
+    """Float sort keys for ``rows``; NaN marks blanks."""
+    column = frame.column(header)[rows]
+    if frame.is_numeric(header):
+        return column.astype(np.float64)
+    lowered = _lowered(frame, header)
+    rank = np.empty(len(lowered), dtype=np.float64)
+    rank[sorted(range(len(lowered)), key=lowered.__getitem__)] = np.arange(len(lowered))
+    rank[[code for code, value in enumerate(lowered) if not value]] = np.nan
+    return rank[column]
+
+
+def _decode(frame: ColumnarDataset, header: str, rows: np.ndarray) -> List[Any]:
+    values = frame.column(header)[rows]
+    categories = frame.categories(header)
+    if categories is not None:
+        return [categories[code] for code in values.tolist()]
+    if values.dtype.kind == "f":
+        return [None if np.isnan(value) else value for value in values.tolist()]
+    return values.tolist()
+
+
+class PlayerStatsTable:
+    """Filter/sort/paginate front end over a columnar stats dataset."""
+
+    def __init__(self, dataset: ColumnarDataset) -> None:
+        self.dataset = dataset
+        self.headers: List[str] = list(dataset.headers)
+        self.numeric_columns: List[str] = list(dataset.numeric_columns)
+        teams = dataset.categories("Team") or []
+        # Region index per team code (-1 for teams without a known region).
+        self._team_region = np.array(
+            [REGIONS.index(team_region(team)) if team_region(team) else -1 for team in teams], dtype=np.int8
+        )
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    @cached_property
+    def _vocabulary(self) -> Dict[str, Tuple[List[Any], List[str]]]:
+        return _numeric_vocabulary(self.dataset)
+
+    @classmethod
+    def from_source(cls, path: Path = PLAYERS_DATASET) -> "PlayerStatsTable":
+        return cls(load_columnar(path))
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def row(self, idx: int) -> Row:
+        rows = np.array([idx])
+        return {header: _decode(self.dataset, header, rows)[0] for header in self.headers}
+
+    def options(self) -> Dict[str, List[str]]:
+        """Distinct values of the filter columns, for the page's autocomplete lists."""
+        return {
+            f"{header.lower()}s": [value for value in self.dataset.categories(header) or () if value]
+            for header in _FILTER_COLUMNS
+        }
+
+    # ------------------------------------------------------------------
+    # Filtering
+    # ------------------------------------------------------------------
+    def _filter_mask(self, frame: ColumnarDataset, query: StatsQuery, *, with_event: bool) -> np.ndarray:
+        mask = np.ones(len(frame), dtype=bool)
+        for header, tokens in (("Team", query.teams), ("Name", query.names), ("Agent", query.agents)):
+            if tokens:
+                mask &= _codes_where(frame, header, lambda value: any(token in value for token in tokens))
+        if with_event and query.events:
+            mask &= _codes_where(frame, "Event", lambda value: _event_matches(value, query.events[0]))
+        if query.text:
+            vocabulary = self._vocabulary if frame is self.dataset else _numeric_vocabulary(frame)
+            for term in query.text.split():
+                mask &= _text_mask(frame, term, vocabulary)
+        return mask
+
+    def _post_mask(self, frame: ColumnarDataset, query: StatsQuery) -> np.ndarray:
+        mask = np.ones(len(frame), dtype=bool)
+        if len(set(query.regions)) < len(REGIONS) and "Team" in frame:
+            wanted = [REGIONS.index(region) for region in query.regions]
+            mask &= np.isin(self._team_region[frame.column("Team")], wanted)
+        if query.min_rounds:
+            mask &= _floats(frame, "Rounds") >= query.min_rounds
+        return mask
+
+    def _combine_events(self, query: StatsQuery) -> ColumnarDataset:
+        """Merge each team/player/agent across the selected events."""
+        base = self.dataset
+        mask = _codes_where(
+            base, "Event", lambda value: value != "all" and any(_event_matches(value, t) for t in query.events)
+        )
+        mask &= self._filter_mask(base, query, with_event=False)
+        rows = np.flatnonzero(mask)
+
+        keys = np.stack([base.column(header)[rows] for header in _GROUP_COLUMNS], axis=1)
+        groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        count = len(groups)
+
+        def total(values: np.ndarray) -> np.ndarray:
+            return np.bincount(inverse, weights=values, minlength=count)
+
+        def ratio(num: np.ndarray, den: np.ndarray, empty: float = 0.0) -> np.ndarray:
+            return np.divide(num, den, out=np.full(count, empty), where=den != 0)
+
+        rounds_in = _floats(base, "Rounds")[rows]
+        sums = {header: total(_floats(base, header)[rows]) for header in _SUM_COLUMNS}
+        rounds = sums["Rounds"]
+        arrays: Dict[str, np.ndarray] = {
+            header: groups[:, i] for i, header in enumerate(_GROUP_COLUMNS)
+        }
+        arrays["Event"] = np.zeros(count, dtype=np.int32)
+        for header, values in sums.items():
+            integral = header in base and base.column(header).dtype.kind == "i"
+            arrays[header] = values.astype(np.int64) if integral else values
+        for header in _WEIGHTED_COLUMNS:
+            arrays[header] = ratio(total(_floats(base, header)[rows] * rounds_in), rounds)
+
+        fkpr, fdpr = ratio(sums["First Kills"], rounds), ratio(sums["First Deaths"], rounds)
+        rvsr = sums["RvsR Kills"] + sums["RvsR Deaths"]
+        arrays.update({
+            "KD": np.where(sums["Deaths"] != 0, ratio(sums["Kills"], sums["Deaths"]), sums["Kills"]),
+            "KPR": ratio(sums["Kills"], rounds),
+            "DPR": ratio(sums["Deaths"], rounds),
+            "APR": ratio(sums["Assists"], rounds),
+            "NDAPR": ratio(sums["Non-damaging A"], rounds),
+            "DAPR": ratio(sums["Damaging A"], rounds),
+            "FKPR": fkpr,
+            "FDPR": fdpr,
+            "FKWR%": ratio(fkpr * 100, fkpr + fdpr, np.nan),
+            "First Agg. Rate": fkpr + fdpr,
+            "TFKPR": ratio(sums["True FK"], rounds),
+            "TFDPR": ratio(sums["True FD"], rounds),
+            "RvsR WR%": ratio(sums["RvsR Kills"] * 100, rvsr, np.nan),
+            "OPKPR": ratio(sums["OP Kills"], rounds),
+            "MKPR": ratio(sums["MK"], rounds),
+            "AcePR": ratio(sums["Aces"], rounds),
+        })
+        for header in self.headers:
+            arrays.setdefault(header, np.full(count, np.nan))
+        categories = {header: base.categories(header) or [] for header in _GROUP_COLUMNS}
+        categories["Event"] = [COMBINED_EVENT]
+        return ColumnarDataset(self.headers, arrays, categories)
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+    def query(self, query: StatsQuery) -> StatsPage:
+        """Filter, sort and paginate; raises ``ValueError`` for an unknown sort column."""
+        if query.sort is not None and query.sort not in self.dataset:
+            raise ValueError(f"Unknown sort column {query.sort!r}.")
+
+        if len(query.events) > 1:
+            frame = self._combine_events(query)
+            mask = self._post_mask(frame, query)
+        else:
+            frame = self.dataset
+            mask = self._filter_mask(frame, query, with_event=True) & self._post_mask(frame, query)
+        rows = np.flatnonzero(mask)
+
+        if query.sort is not None:
+            keys = _sort_keys(frame, query.sort, rows)
+            # Stable sort; NaN (blank) keys stay last in both directions.
+            rows = rows[np.argsort(-keys if query.descending else keys, kind="stable")]
+
+        total = len(rows)
+        pages = max(1, -(-total // query.page_size))
+        page = min(query.page, pages)
+        start = (page - 1) * query.page_size
+        visible = rows[start:start + query.page_size]
+        columns = {header: _decode(frame, header, visible) for header in self.headers}
+        return StatsPage(
+            headers=list(self.headers),
+            numeric_columns=list(self.numeric_columns),
+            total=total,
+            page=page,
+            page_size=query.page_size,
+            pages=pages,
+            rows=[dict(zip(self.headers, values)) for values in zip(*columns.values())],
+        )
+
+
+@lru_cache()
+def get_player_stats_table() -> PlayerStatsTable:
+    """Return the process-wide table over ``static/dataset_players.json``."""
+    return PlayerStatsTable.from_source()
+
+
+__all__ = [
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "PLAYERS_DATASET",
+    "REGIONS",
+    "TEAM_REGIONS",
+    "PlayerStatsTable",
+    "StatsPage",
+    "StatsQuery",
+    "get_player_stats_table",
+    "team_region",
+]
@@ -0,0 +1,76 @@
+"""Bounded-concurrency match downloader paced by the valolytics rate limiter."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .match_store import get_match_archive
+from .riot_api import get_match_by_match_id
+
+try:
+    DEFAULT_PREFETCH_WORKERS = max(1, int(os.getenv("MATCH_PREFETCH_WORKERS", "4")))
+except ValueError:
+    DEFAULT_PREFETCH_WORKERS = 4
+
+# How often the consumer thread wakes up to poll ``sleep_fn`` for cancellation.
+_POLL_SECONDS = 0.5
+
+
+def prefetch_matches(
+    match_ids: Iterable[str],
+    region: str,
+    *,
+    max_workers: int = DEFAULT_PREFETCH_WORKERS,
+    sleep_fn: Callable[[float], None] = time.sleep,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(match_id, payload)`` pairs as soon as each one is available.
+
+    Archived matches are yielded first without touching the network; the rest
+    are downloaded by up to ``max_workers`` threads, paced by the valolytics
+    limiter inside ``riot_api`` (one token per attempt). ``sleep_fn(0)`` is called between
+    completions so cancellation-aware sleepers (see
+    ``jobs.analytical_report_job``) can abort the loop; closing the generator
+    stops the workers and drops queued downloads.
+    """
+    archive = get_match_archive()
+    pending = []
+    for match_id in dict.fromkeys(match_ids):
+        cached = archive.get(match_id, region)
+        if cached is not None:
+            yield match_id, cached
+        else:
+            pending.append(match_id)
+    if not pending:
+        return
+
+    stop = threading.Event()
+
+    def fetch(match_id: str) -> Optional[Dict[str, Any]]:
+        if stop.is_set():
+            return None
+        return get_match_by_match_id(match_id, region)
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(pending))),
+        thread_name_prefix="match-prefetch",
+    )
+    futures = {executor.submit(fetch, match_id): match_id for match_id in pending}
+    try:
+        not_done = set(futures)
+        while not_done:
+            done, not_done = wait(not_done, timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            sleep_fn(0)
+            for future in done:
+                payload = future.result()
+                if payload is not None:
+                    yield futures[future], payload
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["DEFAULT_PREFETCH_WORKERS", "prefetch_matches"]
@@ -0,0 +1,130 @@
+"""Ranked agent/map profile of an opponent, as shown by ``/search_player``.
+
+The matchlist is pulled once, the competitive match payloads are fetched
+through :func:`functions.prefetch.prefetch_matches` (archive first, then
+concurrently under the valolytics rate limiter) and maps/agents are resolved
+from the local content catalogue. Finished profiles are cached per puuid for
+``RANKED_PROFILE_TTL_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .prefetch import prefetch_matches
+from .riot_api import get_agent_by_puuid, get_map_by_id, get_matchlist_by_puuid, get_puuid_by_riotid
+
+PROFILE_WINDOW = datetime.timedelta(weeks=3)
+
+try:
+    PROFILE_TTL_SECONDS = max(0, int(os.getenv("RANKED_PROFILE_TTL_SECONDS", "600")))
+except ValueError:
+    PROFILE_TTL_SECONDS = 600
+
+Profile = Tuple[Dict[str, Dict[str, int]], str]
+
+_LOCK = threading.Lock()
+# Riot ids map to puuids permanently, so these never expire.
+_PUUIDS: Dict[Tuple[str, str], str] = {}
+_PROFILES: Dict[str, Tuple[float, Profile]] = {}
+
+
+def resolve_puuid(data_player: Dict[str, Any]) -> str:
+    """Return the puuid for an ``opponents.json`` entry, looking it up once per process."""
+    key = (data_player["gameName"], data_player["tagLine"])
+    with _LOCK:
+        puuid = _PUUIDS.get(key)
+    if puuid is None:
+        puuid = get_puuid_by_riotid(data_player["gameName"], data_player["tagLine"], data_player["region"])["puuid"]
+        with _LOCK:
+            _PUUIDS[key] = puuid
+    return puuid
+
+
+def competitive_match_ids(matchlist: Dict[str, Any], since: datetime.date) -> List[str]:
+    """Competitive match ids played on or after ``since`` (the matchlist is newest-first)."""
+    match_ids = []
+    for match in matchlist.get("history", []):
+        match_date = datetime.date.fromisoformat(match["gameStartTime"].split("T")[0])
+        if match_date < since:
+            break
+        if match["queueId"] == "competitive":
+            match_ids.append(match["matchId"])
+    return match_ids
+
+
+def _count_pick(data: Dict[str, Dict[str, int]], payload: Dict[str, Any], puuid: str) -> None:
+    for player in payload.get("players", []):
+        if player["puuid"] != puuid:
+            continue
+        map_name = get_map_by_id(payload["matchInfo"]["mapId"])
+        agent = get_agent_by_puuid(player["characterId"])["data"]["displayName"]
+        per_map = data.setdefault(map_name, {})
+        per_map[agent] = per_map.get(agent, 0) + 1
+        data["All"][agent] = data["All"].get(agent, 0) + 1
+        return
+
+
+def build_ranked_profile(
+    puuid: str,
+    region: str,
+    *,
+    matchlist: Optional[Dict[str, Any]] = None,
+    since: Optional[datetime.date] = None,
+    progress_callback: Optional[Callable[[str], None]] = None,
+) -> Profile:
+    """Count agent picks per map over the player's recent competitive games.
+
+    Returns ``(data, last_day)`` where ``data`` is ``{"All" | map: {agent: n}}``
+    sorted by pick count and ``last_day`` is the first day of the window.
+    ``progress_callback`` receives a short message after each processed match.
+    """
+    since = since or datetime.date.today() - PROFILE_WINDOW
+    if matchlist is None:
+        matchlist = get_matchlist_by_puuid(puuid, region)
+
+    match_ids = competitive_match_ids(matchlist, since)
+    if progress_callback:
+        progress_callback(f"Found {len(match_ids)} competitive matches since {since.isoformat()}.")
+
+    data: Dict[str, Dict[str, int]] = {"All": {}}
+    for done, (_, payload) in enumerate(prefetch_matches(match_ids, region), start=1):
+        _count_pick(data, payload, puuid)
+        if progress_callback:
+            progress_callback(f"Processed match {done}/{len(match_ids)}.")
+
+    for key in data:
+        data[key] = dict(sorted(data[key].items(), key=lambda item: item[1], reverse=True))
+    return data, since.isoformat()
+
+
+def get_ranked_profile(data_player: Dict[str, Any], *, use_cache: bool = True) -> Profile:
+    """Profile for an ``opponents.json`` entry, served from the TTL cache when fresh."""
+    puuid = resolve_puuid(data_player)
+    now = time.monotonic()
+    if use_cache:
+        with _LOCK:
+            cached = _PROFILES.get(puuid)
+        if cached is not None and now - cached[0] < PROFILE_TTL_SECONDS:
+            return cached[1]
+
+    profile = build_ranked_profile(puuid, data_player["region_matchlist"])
+    with _LOCK:
+        _PROFILES[puuid] = (time.monotonic(), profile)
+        for stale in [key for key, (stamp, _) in _PROFILES.items() if now - stamp >= PROFILE_TTL_SECONDS]:
+            del _PROFILES[stale]
+    return profile
+
+
+__all__ = [
+    "PROFILE_TTL_SECONDS",
+    "PROFILE_WINDOW",
+    "build_ranked_profile",
+    "competitive_match_ids",
+    "get_ranked_profile",
+    "resolve_puuid",
+]
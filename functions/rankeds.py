@@ -1,10 +1,13 @@
 import datetime
 import json
+import logging
 import time
 from datetime import timedelta
 
 from .config import PROJECT_ROOT
-from .riot_api import get_match_by_match_id, get_matchlist_by_puuid
+from .match_history import get_match_history_store
+from .prefetch import prefetch_matches
+from .riot_api_async import fetch_matchlists
 
 RANKEDS_DIR = PROJECT_ROOT / "data" / "rankeds"
 PLAYERS_DIR = RANKEDS_DIR / "players"
@@ -13,6 +16,16 @@ PLAYERS_DIR.mkdir(parents=True, exist_ok=True)
 RANKEDS_FILE = RANKEDS_DIR / "rankeds.json"
 RANKEDS_KDA_FILE = RANKEDS_DIR / "rankeds_kda.json"
 RANKEDS_OTHER_FILE = RANKEDS_DIR / "rankeds_other.json"
+RANKEDS_STATUS_FILE = RANKEDS_DIR / "refresh_status.json"
+PUUID_LIST_FILE = PROJECT_ROOT / "static" / "puuid_list.json"
+DEFAULT_WINDOW = timedelta(weeks=2)
+# Days up to here come from the hand-maintained per-player JSON files.
+STATIC_CUTOFF = datetime.date(2025, 6, 25)
+
+logger = logging.getLogger(__name__)
+
+TRACKED_QUEUES = ("competitive", "deathmatch", "hurm")
+KDA_EXCLUDED_QUEUES = ("hurm", "ggteam", "swiftplay", "deathmatch")
 
 two_weeks_ago = datetime.datetime.today() - timedelta(weeks=2)
 players = {"benjy": 'vhTtIAHoN9juR-MTHWhQsRmSipbTmHdZxh-GKsnLI6qOElJiy9Lc5rWF8DIItfqjP9aJUjee6nYqaw',
@@ -54,134 +67,256 @@ def load_static_data():
         static_data[player] = entries
     return static_data
 
-def save_static_data(static_data):
-    for player, entries in static_data.items():
-        filepath = STATIC_FILES.get(player)
-        if not filepath:
+def _static_counts(entries, static_cutoff):
+    """Convert static JSON entries to ``({day: counts}, {day: counts})`` before/after the cutoff.
+
+    Entries up to the cutoff were entered by hand; later ones were appended by
+    older versions of :func:`get_players_data`, which wrote the deathmatch and
+    hurm columns the other way round and could repeat a day with partial
+    counts (the largest value per queue is kept).
+    """
+    historical, appended = {}, {}
+    for entry in entries:
+        if not isinstance(entry, dict):
             continue
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-        # Wrap back as a dict keyed by player for consistency
-        out = {player: entries}
-        with filepath.open("w", encoding="utf-8") as f:
-            json.dump(out, f, indent=4)
+        day_str = entry.get("fecha")
+        try:
+            match_date = datetime.datetime.strptime(day_str, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            continue
+        if match_date <= static_cutoff:
+            historical[day_str] = {
+                "competitive": entry.get("partidas_competitivas", 0),
+                "deathmatch": entry.get("dms_jugados", 0),
+                "hurm": entry.get("team_deathmatch", 0),
+            }
+        else:
+            counts = appended.setdefault(day_str, {queue: 0 for queue in TRACKED_QUEUES})
+            counts["competitive"] = max(counts["competitive"], entry.get("partidas_competitivas", 0))
+            counts["deathmatch"] = max(counts["deathmatch"], entry.get("team_deathmatch", 0))
+            counts["hurm"] = max(counts["hurm"], entry.get("dms_jugados", 0))
+    return historical, appended
 
 
-def get_players_data(start_date: datetime.date, end_date: datetime.date, static_cutoff: datetime.date = datetime.date(2025, 6, 25)):
-    data = {player: {} for player in players}
-    static_data = load_static_data()
+def seed_static_counts(history, static_cutoff):
+    """Import the per-player JSON files into the daily counter store when they change."""
+    static_data = None
+    for player, filepath in STATIC_FILES.items():
+        try:
+            version = f"{filepath.stat().st_mtime_ns}:{static_cutoff.isoformat()}"
+        except FileNotFoundError:
+            continue
+        key = f"static_counts:{player}"
+        if history.get_meta(key) == version:
+            continue
+        if static_data is None:
+            static_data = load_static_data()
+        historical, appended = _static_counts(static_data.get(player, []), static_cutoff)
+        history.upsert_daily_counts(player, historical)
+        # Live counts from the match history take precedence over old appends.
+        history.upsert_daily_counts(player, appended, overwrite=False)
+        history.set_meta(key, version)
 
-    for player, entries in static_data.items():
-        if player not in data:
+
+def sync_match_histories(tracked, static_cutoff: datetime.date = STATIC_CUTOFF):
+    """Fetch the matchlists of ``tracked`` (name -> puuid) and merge new games.
+
+    Only entries newer than each puuid's sync cursor are written, and the daily
+    counters of core players are updated for the days that received games, so
+    every sync (whichever table triggered it) shows up in the rankeds table.
+    Players whose matchlist cannot be fetched or parsed keep their previously
+    stored history. Returns ``{player: newly stored entries}``.
+    """
+    history = get_match_history_store()
+    matchlists = fetch_matchlists(tracked, "eu")
+    counted = {puuid: player for player, puuid in players.items()}
+    fresh = {}
+    for player, puuid in tracked.items():
+        matchlist = matchlists[player]
+        if isinstance(matchlist, Exception):
+            logger.warning("Using stored history for %s: matchlist unavailable (%s)", player, matchlist)
             continue
-        for entry in entries:
-            day_str = entry.get("fecha")
-            try:
-                match_date = datetime.datetime.strptime(day_str, "%Y-%m-%d").date()
-            except Exception:
-                continue
-            if not (start_date <= match_date <= end_date):
-                continue
-            if match_date <= static_cutoff:
-                data[player][day_str] = {
-                    "competitive": entry.get("partidas_competitivas", 0),
-                    "deathmatch": entry.get("dms_jugados", 0),
-                    "hurm": entry.get("team_deathmatch", 0),
-                }
-
-    for player, puuid in players.items():
-        matchlist = get_matchlist_by_puuid(puuid, "eu")
-        new_entries = []
-        for match in matchlist.get("history", []):
-            date_str = match.get("gameStartTime", "").split("T")[0]
-            try:
-                match_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-            except Exception:
-                continue
-            # Skip out-of-range or already-covered dates
-            if match_date < start_date or match_date > end_date or match_date <= static_cutoff:
-                continue
-            q = match.get("queueId")
-            if q not in ("competitive", "deathmatch", "hurm"):
-                continue
-            # Initialize day counts if needed
-            if date_str not in data[player]:
-                data[player][date_str] = {"competitive": 0, "deathmatch": 0, "hurm": 0}
-            data[player][date_str][q] += 1
-            existing = {e.get("fecha") for e in static_data.get(player, []) if isinstance(e, dict)}
-            for day, counts in sorted(data[player].items()):
-                d = datetime.datetime.strptime(day, "%Y-%m-%d").date()
-                if d > static_cutoff and day not in existing:
-                    new_entries.append({
-                        "fecha": day,
-                        "dms_jugados": counts.get("hurm", 0),
-                        "partidas_competitivas": counts.get("competitive", 0),
-                        "team_deathmatch": counts.get("deathmatch", 0),
-                    })
-            # append new entries
-            static_data[player].extend(new_entries)
-
-    # Save back static files
-    save_static_data(static_data)
-
-    with RANKEDS_FILE.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+        try:
+            fresh[player] = history.sync(puuid, matchlist)
+        except (AttributeError, TypeError) as exc:
+            logger.warning("Using stored history for %s: malformed matchlist (%s)", player, exc)
+            continue
+        if puuid in counted:
+            _update_daily_counts(history, counted[puuid], puuid, fresh[player], static_cutoff)
+    return fresh
+
+
+def _update_daily_counts(history, player, puuid, entries, static_cutoff):
+    """Upsert the counters of ``player`` for the live days touched by ``entries``."""
+    backfill_key = f"live_counts:{player}"
+    live_start = static_cutoff + timedelta(days=1)
+    days = sorted({entry["game_date"] for entry in entries})
+    if history.get_meta(backfill_key) is None:
+        # First sync since the counter store existed: cover everything synced so far.
+        days_start, days_end = live_start, datetime.date.today()
+    elif days:
+        days_start = max(live_start, datetime.date.fromisoformat(days[0]))
+        days_end = datetime.date.fromisoformat(days[-1])
+    else:
+        return
+    if days_start <= days_end:
+        history.upsert_daily_counts(player, history.daily_counts(puuid, days_start, days_end, TRACKED_QUEUES))
+    history.set_meta(backfill_key, datetime.date.today().isoformat())
+
+
+def get_players_data(start_date: datetime.date, end_date: datetime.date, static_cutoff: datetime.date = STATIC_CUTOFF, *, refresh: bool = True):
+    """Daily queue counts for the core roster.
+
+    Counts live in the daily counter store: days up to ``static_cutoff`` come
+    from the per-player JSON files (imported when they change), later days
+    from the synced match history. With ``refresh`` the matchlists are synced
+    from upstream (which upserts the days that received new games) and the
+    table is persisted; without it the table is read from local data only.
+    """
+    history = get_match_history_store()
+    seed_static_counts(history, static_cutoff)
+
+    if refresh:
+        sync_match_histories(players, static_cutoff)
+
+    data = {
+        player: history.stored_daily_counts(player, start_date, end_date, TRACKED_QUEUES)
+        for player in players
+    }
+
+    if refresh:
+        with RANKEDS_FILE.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
     return data
 
-def regenerate_kda():
-    data = {p: {"all": [0, 0, 0]} for p in players}
-    two_weeks_ago = datetime.datetime.today() - timedelta(weeks=2)
-
-    for player in players:
-        print(player)
-        matchlist = get_matchlist_by_puuid(players[player], "eu")
-        for match in matchlist["history"]:
-            day_str = match["gameStartTime"].split("T")[0]
-            match_date = datetime.datetime.strptime(day_str, "%Y-%m-%d")
-            if match_date.year != 2025 or match_date < two_weeks_ago:
-                break
-            if match["queueId"] in ["hurm", "ggteam", "swiftplay", "deathmatch"]:
-                continue
-            time.sleep(1)
-            match_data = get_match_by_match_id(match["matchId"], "eu")
-            for player_i in match_data["players"]:
-                if player_i["puuid"] == players[player]:
-                    data[player]["all"][0] += player_i["stats"]["kills"]
-                    data[player]["all"][1] += player_i["stats"]["deaths"]
-                    data[player]["all"][2] += player_i["stats"]["vlrRating2"]
-    with RANKEDS_KDA_FILE.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+def extract_match_stats(tracked, start_date: datetime.date, end_date: datetime.date):
+    """Store per-match stat extracts for every KDA-relevant game of ``tracked`` in the window.
+
+    Match ids are deduplicated across players (a shared game is downloaded
+    once) and only matches without an extract are fetched, concurrently and
+    under the valolytics rate limiter. Returns the number of new extracts.
+    """
+    history = get_match_history_store()
+    stored = 0
+    for match_id, payload in prefetch_matches(missing_kda_extracts(start_date, end_date, tracked), "eu"):
+        history.store_stat_extract(match_id, payload)
+        stored += 1
+    return stored
+
+
+def missing_kda_extracts(start_date: datetime.date, end_date: datetime.date, tracked=None):
+    """Ids of the KDA-relevant games of ``tracked`` (default: the core roster) in the window without an extract."""
+    history = get_match_history_store()
+    match_ids = [
+        entry["match_id"]
+        for puuid in (tracked or players).values()
+        for entry in history.entries(puuid, start_date, end_date)
+        if entry["queue_id"] not in KDA_EXCLUDED_QUEUES
+    ]
+    return history.missing_stat_extracts(match_ids)
+
+
+def regenerate_kda(start_date=None, end_date=None, *, refresh: bool = True):
+    """Kills, deaths and summed vlrRating2 per core player over the window.
+
+    Defaults to the last two weeks. With ``refresh`` the matchlists are synced,
+    missing match extracts are fetched and the table is persisted; without it
+    the totals are re-aggregated from the local extracts only.
+    """
+    end_date = end_date or datetime.date.today()
+    start_date = start_date or end_date - DEFAULT_WINDOW
+    history = get_match_history_store()
+    if refresh:
+        sync_match_histories(players)
+        extract_match_stats(players, start_date, end_date)
+
+    data = {
+        player: {"all": history.kda_totals(puuid, start_date, end_date, exclude_queues=KDA_EXCLUDED_QUEUES)}
+        for player, puuid in players.items()
+    }
+    if refresh:
+        with RANKEDS_KDA_FILE.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
     return data
 
-def get_other_players_data(start_date: datetime.date, end_date: datetime.date, players):
-    data = {player: {} for player in players}
-    for player, puuid in players.items():
-        try:
-            matchlist = get_matchlist_by_puuid(puuid, "eu")
-            for match in matchlist["history"]:
-                date_str = match["gameStartTime"].split("T")[0]
-                match_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-                if match_date < start_date or match_date > end_date:
-                    continue
-                q = match["queueId"]
-                if q not in ("competitive", "deathmatch", "hurm"):
-                    continue
-                day = date_str
-                if day not in data[player]:
-                    data[player][day] = {"competitive": 0, "deathmatch": 0, "hurm": 0}
-                data[player][day][q] += 1
-        except:
-            continue
+def get_other_players_data(start_date: datetime.date, end_date: datetime.date, players, *, refresh: bool = True):
+    if refresh:
+        sync_match_histories(players)
+    history = get_match_history_store()
+    data = {
+        player: history.daily_counts(puuid, start_date, end_date, TRACKED_QUEUES)
+        for player, puuid in players.items()
+    }
 
-    with RANKEDS_OTHER_FILE.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    if refresh:
+        with RANKEDS_OTHER_FILE.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
     return data
 
 
+def load_tracked_players():
+    with PUUID_LIST_FILE.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def load_refresh_status():
+    """Return the metadata written by the last :func:`refresh_rankeds_tables`, if any."""
+    try:
+        with RANKEDS_STATUS_FILE.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def seconds_since_refresh(status=None):
+    status = status if status is not None else load_refresh_status()
+    if not status or not status.get("refreshed_at"):
+        return None
+    refreshed_at = datetime.datetime.fromisoformat(status["refreshed_at"])
+    return (datetime.datetime.now(datetime.timezone.utc) - refreshed_at).total_seconds()
+
+
+def refresh_rankeds_tables(today=None):
+    """Sync every tracked player and precompute both tables for the default window."""
+    today = today or datetime.date.today()
+    start_date = today - DEFAULT_WINDOW
+    started = time.monotonic()
+    tracked = load_tracked_players()
+    get_players_data(start_date, today)
+    get_other_players_data(start_date, today, tracked)
+    # The roster's matchlists were just synced by get_players_data.
+    extract_match_stats(players, start_date, today)
+    with RANKEDS_KDA_FILE.open("w", encoding="utf-8") as f:
+        json.dump(regenerate_kda(start_date, today, refresh=False), f, indent=4)
+    status = {
+        "refreshed_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "start_date": start_date.isoformat(),
+        "end_date": today.isoformat(),
+        "players": len(players) + len(tracked),
+        "duration_seconds": round(time.monotonic() - started, 2),
+    }
+    with RANKEDS_STATUS_FILE.open("w", encoding="utf-8") as f:
+        json.dump(status, f, indent=4)
+    return status
+
+
 __all__ = [
+    "sync_match_histories",
     "get_players_data",
     "regenerate_kda",
+    "extract_match_stats",
+    "missing_kda_extracts",
     "get_other_players_data",
+    "load_tracked_players",
+    "load_refresh_status",
+    "seconds_since_refresh",
+    "refresh_rankeds_tables",
+    "seed_static_counts",
+    "TRACKED_QUEUES",
+    "STATIC_CUTOFF",
+    "DEFAULT_WINDOW",
     "RANKEDS_FILE",
     "RANKEDS_KDA_FILE",
     "RANKEDS_OTHER_FILE",
+    "RANKEDS_STATUS_FILE",
 ]
@@ -0,0 +1,153 @@
+"""In-memory, date-sorted index over the stored rankeds counts.
+
+Per player the days are kept in a sorted list with one prefix-sum array per
+queue, so the totals for any ``[start, end]`` window are two bisects and a
+subtraction. The index is rebuilt only when the match history store reports
+a new revision.
+"""
+
+from __future__ import annotations
+
+import datetime
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .match_history import MatchHistoryStore, get_match_history_store
+from .rankeds import STATIC_CUTOFF, TRACKED_QUEUES, players as CORE_PLAYERS, seed_static_counts
+
+_ALL_TIME = (datetime.date.min, datetime.date.max)
+
+
+class _PlayerSeries:
+    __slots__ = ("days", "counts", "prefix")
+
+    def __init__(self, per_day: Mapping[str, Mapping[str, int]], queues: Sequence[str]) -> None:
+        self.days: List[str] = sorted(per_day)
+        self.counts: Dict[str, List[int]] = {
+            queue: [per_day[day].get(queue, 0) for day in self.days] for queue in queues
+        }
+        self.prefix: Dict[str, List[int]] = {}
+        for queue, values in self.counts.items():
+            running = [0]
+            for value in values:
+                running.append(running[-1] + value)
+            self.prefix[queue] = running
+
+    def bounds(self, start: str, end: str) -> Tuple[int, int]:
+        return bisect_left(self.days, start), bisect_right(self.days, end)
+
+
+class RankedsIndex:
+    """Daily queue counts for a set of players, queryable by date window."""
+
+    def __init__(
+        self,
+        per_player: Mapping[str, Mapping[str, Mapping[str, int]]],
+        queues: Sequence[str] = TRACKED_QUEUES,
+    ) -> None:
+        self.queues = tuple(queues)
+        self._series = {player: _PlayerSeries(days, self.queues) for player, days in per_player.items()}
+
+    @property
+    def players(self) -> List[str]:
+        return list(self._series)
+
+    def totals(self, player: str, start_date: datetime.date, end_date: datetime.date) -> Dict[str, int]:
+        """Return ``{queue: count}`` for ``player`` between the dates (inclusive)."""
+        series = self._series.get(player)
+        if series is None:
+            return {queue: 0 for queue in self.queues}
+        lo, hi = series.bounds(start_date.isoformat(), end_date.isoformat())
+        return {queue: series.prefix[queue][hi] - series.prefix[queue][lo] for queue in self.queues}
+
+    def daily(
+        self, player: str, start_date: datetime.date, end_date: datetime.date
+    ) -> Dict[str, Dict[str, int]]:
+        """Return ``{day: {queue: count}}`` for the days with games in the window."""
+        series = self._series.get(player)
+        if series is None:
+            return {}
+        lo, hi = series.bounds(start_date.isoformat(), end_date.isoformat())
+        return {
+            series.days[i]: {queue: series.counts[queue][i] for queue in self.queues}
+            for i in range(lo, hi)
+        }
+
+    def window(
+        self,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        *,
+        include_days: bool = False,
+    ) -> Dict[str, Dict[str, object]]:
+        result: Dict[str, Dict[str, object]] = {}
+        for player in self._series:
+            entry: Dict[str, object] = {"totals": self.totals(player, start_date, end_date)}
+            if include_days:
+                entry["days"] = self.daily(player, start_date, end_date)
+            result[player] = entry
+        return result
+
+
+def build_core_index(store: MatchHistoryStore) -> RankedsIndex:
+    """Index of the core roster, read from the daily counter store."""
+    return RankedsIndex(
+        {player: store.stored_daily_counts(player, *_ALL_TIME, TRACKED_QUEUES) for player in CORE_PLAYERS}
+    )
+
+
+def build_tracked_index(store: MatchHistoryStore, tracked: Mapping[str, str]) -> RankedsIndex:
+    """Index of ``tracked`` (name -> puuid), aggregated from the match history."""
+    return RankedsIndex(
+        {player: store.daily_counts(puuid, *_ALL_TIME, TRACKED_QUEUES) for player, puuid in tracked.items()}
+    )
+
+
+_CACHE: Dict[object, Tuple[int, RankedsIndex]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def get_rankeds_index(tracked: Optional[Mapping[str, str]] = None) -> RankedsIndex:
+    """Return the core roster index, or the index for ``tracked`` when given.
+
+    Indexes are memoised until the store's revision changes.
+    """
+    store = get_match_history_store()
+    if tracked is None:
+        # Picks up edits to the static JSON files (bumps the revision if any).
+        seed_static_counts(store, STATIC_CUTOFF)
+    revision = store.revision()
+    key = "core" if tracked is None else frozenset(tracked.items())
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+    index = build_core_index(store) if tracked is None else build_tracked_index(store, tracked)
+    with _CACHE_LOCK:
+        if tracked is not None:
+            # Only one tracked list is live at a time; drop stale ones.
+            for stale in [k for k in _CACHE if k != "core"]:
+                del _CACHE[stale]
+        _CACHE[key] = (revision, index)
+    return index
+
+
+def query_rankeds_window(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    tracked: Optional[Mapping[str, str]] = None,
+    *,
+    include_days: bool = False,
+) -> Dict[str, Dict[str, object]]:
+    """Per-player queue totals (and optionally daily counts) between two dates."""
+    return get_rankeds_index(tracked).window(start_date, end_date, include_days=include_days)
+
+
+__all__ = [
+    "RankedsIndex",
+    "build_core_index",
+    "build_tracked_index",
+    "get_rankeds_index",
+    "query_rankeds_window",
+]
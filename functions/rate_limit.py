@@ -0,0 +1,181 @@
+"""Token-bucket rate limiting for upstream APIs.
+
+The valolytics quota is shared by every gunicorn and RQ worker, so its
+bucket lives in Redis when Redis is reachable. Without Redis each process
+gets an equal slice (``VALOLYTICS_PROCESSES``) of the quota instead.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+import redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+def _float_env(var_name: str, default: float) -> float:
+    value = os.getenv(var_name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value)
+    except ValueError:
+        return default
+    return parsed if parsed > 0 else default
+
+
+# valolytics quota: sustained requests per second and the burst we allow.
+VALOLYTICS_RATE_PER_SECOND = _float_env("VALOLYTICS_RATE_PER_SECOND", 2.0)
+VALOLYTICS_BURST = _float_env("VALOLYTICS_BURST", 4.0)
+
+# Processes sharing the quota when it cannot be coordinated through Redis.
+try:
+    VALOLYTICS_PROCESSES = max(
+        1, int(os.getenv("VALOLYTICS_PROCESSES", os.getenv("WEB_CONCURRENCY", "1")))
+    )
+except ValueError:
+    VALOLYTICS_PROCESSES = 1
+
+VALOLYTICS_LIMITER_KEY = "rate-limit:valolytics"
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, at most ``capacity`` banked."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1.")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` if available. Returns 0 on success, else seconds to wait."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, *, stop: Optional[threading.Event] = None) -> bool:
+        """Block until ``tokens`` are available. Returns False if ``stop`` was set."""
+        while True:
+            wait_for = self.try_acquire(tokens)
+            if wait_for <= 0:
+                return True
+            if stop is not None:
+                if stop.wait(wait_for):
+                    return False
+            else:
+                time.sleep(wait_for)
+
+
+# Refill and take atomically, on the Redis clock so every host agrees on "now".
+# The wait is returned as a string because Lua numbers come back truncated.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket(TokenBucket):
+    """Token bucket kept in Redis so that all processes draw from one quota.
+
+    If Redis stops answering, tokens are taken from ``fallback`` (a
+    per-process bucket) until it is reachable again.
+    """
+
+    def __init__(
+        self,
+        redis_conn: redis.Redis,
+        key: str,
+        rate: float,
+        capacity: float,
+        *,
+        fallback: TokenBucket,
+    ) -> None:
+        super().__init__(rate, capacity)
+        self.key = key
+        self.fallback = fallback
+        self._take = redis_conn.register_script(_TAKE_SCRIPT)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        try:
+            wait_for = self._take(keys=[self.key], args=[self.rate, self.capacity, tokens])
+        except RedisError as exc:
+            logger.warning("Redis rate limiter unavailable, limiting per process: %s", exc)
+            return self.fallback.try_acquire(tokens)
+        return float(wait_for)
+
+
+@lru_cache()
+def get_valolytics_limiter() -> TokenBucket:
+    """Return the limiter shared by every valolytics caller.
+
+    Backed by Redis when ``REDIS_URL`` answers, otherwise a per-process bucket
+    holding this process's share of the quota.
+    """
+    local = TokenBucket(
+        VALOLYTICS_RATE_PER_SECOND / VALOLYTICS_PROCESSES,
+        max(1.0, VALOLYTICS_BURST / VALOLYTICS_PROCESSES),
+    )
+    try:
+        redis_conn = redis.from_url(
+            os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"), socket_connect_timeout=2
+        )
+        redis_conn.ping()
+    except RedisError as exc:
+        logger.warning(
+            "Redis unavailable, valolytics quota split across %s process(es): %s",
+            VALOLYTICS_PROCESSES,
+            exc,
+        )
+        return local
+    return RedisTokenBucket(
+        redis_conn,
+        VALOLYTICS_LIMITER_KEY,
+        VALOLYTICS_RATE_PER_SECOND,
+        VALOLYTICS_BURST,
+        fallback=local,
+    )
+
+
+__all__ = [
+    "RedisTokenBucket",
+    "TokenBucket",
+    "VALOLYTICS_BURST",
+    "VALOLYTICS_PROCESSES",
+    "VALOLYTICS_RATE_PER_SECOND",
+    "get_valolytics_limiter",
+]
@@ -0,0 +1,223 @@
+"""Retry with jittered backoff and per-host circuit breaking for HTTP calls."""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, FrozenSet, Optional
+from urllib.parse import urlparse
+
+import requests
+
+
+def _number_env(var_name: str, default: float) -> float:
+    value = os.getenv(var_name)
+    if value is None:
+        return default
+    try:
+        parsed = float(value)
+    except ValueError:
+        return default
+    return parsed if parsed >= 0 else default
+
+
+HTTP_MAX_RETRIES = int(_number_env("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_BASE_SECONDS = _number_env("HTTP_BACKOFF_BASE_SECONDS", 0.5)
+HTTP_BACKOFF_CAP_SECONDS = _number_env("HTTP_BACKOFF_CAP_SECONDS", 30.0)
+BREAKER_FAILURE_THRESHOLD = max(1, int(_number_env("HTTP_BREAKER_FAILURES", 5)))
+BREAKER_RESET_SECONDS = _number_env("HTTP_BREAKER_RESET_SECONDS", 30.0)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without contacting the host while its circuit breaker is open."""
+
+
+# Failures that say something about the host's health; anything else (a bad
+# URL or header, a redirect loop, a bug in ``send``) is raised straight away.
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the delay in seconds encoded in a ``Retry-After`` header."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_retries: int = HTTP_MAX_RETRIES
+    backoff_base: float = HTTP_BACKOFF_BASE_SECONDS
+    backoff_cap: float = HTTP_BACKOFF_CAP_SECONDS
+    retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """Seconds to wait before retry ``attempt`` (0-based).
+
+        Uses the server's ``Retry-After`` when given, otherwise "full jitter"
+        exponential backoff. Returns None when the server asks us to wait
+        longer than ``backoff_cap``; the caller should give up instead.
+        """
+        requested = parse_retry_after(retry_after)
+        if requested is not None:
+            return requested if requested <= self.backoff_cap else None
+        ceiling = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open after a cool-down.
+
+    While open, callers fail immediately with :class:`CircuitOpenError`
+    instead of each waiting out a full request timeout. After
+    ``reset_timeout`` one trial request is let through; its outcome closes
+    or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        *,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_SECONDS,
+    ) -> None:
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_request(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            cooling = time.monotonic() - self._opened_at < self.reset_timeout
+            if cooling or self._trial_in_flight:
+                raise CircuitOpenError(f"Circuit open for {self.host}; upstream marked unavailable.")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """End a half-open trial that told us nothing about the host's health."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host)
+            _BREAKERS[host] = breaker
+        return breaker
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def request_with_retry(
+    send: Callable[[], requests.Response],
+    url: str,
+    *,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    sleep_fn: Callable[[float], None] = time.sleep,
+) -> requests.Response:
+    """Call ``send`` until it yields a non-retryable response or retries run out.
+
+    Transient transport errors (connection errors, timeouts, truncated
+    bodies) and 5xx responses count against the host's circuit breaker and
+    are retried; 429s are retried (honouring ``Retry-After``) but do not trip
+    it, since the upstream is alive and only throttling us. Any other
+    exception from ``send`` is not retried: it only releases a half-open
+    trial before propagating.
+    """
+    breaker = get_circuit_breaker(urlparse(url).netloc)
+    attempt = 0
+    while True:
+        breaker.before_request()
+        try:
+            response = send()
+        except TRANSIENT_ERRORS:
+            breaker.record_failure()
+            if attempt >= policy.max_retries:
+                raise
+            sleep_fn(policy.delay(attempt) or 0)
+            attempt += 1
+            continue
+        except BaseException:
+            # Still settle a half-open trial, or the host would stay open for good.
+            breaker.release_trial()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        if response.status_code in policy.retry_statuses and attempt < policy.max_retries:
+            delay = policy.delay(attempt, response.headers.get("Retry-After"))
+            if delay is not None:
+                response.close()
+                sleep_fn(delay)
+                attempt += 1
+                continue
+        return response
+
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "DEFAULT_RETRY_POLICY",
+    "RetryPolicy",
+    "TRANSIENT_ERRORS",
+    "get_circuit_breaker",
+    "parse_retry_after",
+    "request_with_retry",
+]
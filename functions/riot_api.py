@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any, Dict, Optional
 
-import requests
-
 from .config import get_settings
+from .http_client import DEFAULT_USER_AGENT, get_http_client
+from .match_store import get_match_archive
+from .rate_limit import get_valolytics_limiter
+from .retry import request_with_retry
 
-DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; ValoHub/1.0; +https://valohub)"
 REQUEST_TIMEOUT = 20
+VALOLYTICS_BASE_URL = "https://api.valolytics.gg/"
 
 
 def _valolytics_headers() -> Dict[str, str]:
@@ -25,19 +27,33 @@ def _valorant_headers() -> Dict[str, str]:
 
 
 def _request_json(method: str, url: str, headers: Dict[str, str]) -> Any:
-    response = requests.request(
-        method,
-        url,
-        headers=headers,
-        timeout=REQUEST_TIMEOUT,
-    )
+    limiter = get_valolytics_limiter() if url.startswith(VALOLYTICS_BASE_URL) else None
+
+    def send():
+        # Every attempt, retries included, spends a token of the shared quota.
+        if limiter is not None:
+            limiter.acquire()
+        return get_http_client().request(
+            method,
+            url,
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    response = request_with_retry(send, url)
     response.raise_for_status()
     return response.json()
 
 
 def get_match_by_match_id(match_id: str, region: str) -> Any:
+    archive = get_match_archive()
+    cached = archive.get(match_id, region)
+    if cached is not None:
+        return cached
     url = f"https://api.valolytics.gg/api/matches/{region}/{match_id}"
-    return _request_json("GET", url, _valolytics_headers())
+    payload = _request_json("GET", url, _valolytics_headers())
+    archive.put(match_id, region, payload)
+    return payload
 
 
 def get_puuid_by_riotid(game_name: str, tag_line: str, region: str) -> Any:
@@ -88,13 +104,20 @@ def get_team_by_id(identifier: str) -> Any:
     return _request_json("GET", url, _valolytics_headers())
 
 
-def get_agent_by_puuid(puuid: str) -> Any:
-    url = f"https://valorant-api.com/v1/agents/{puuid}"
+def _content_catalog():
+    # Imported lazily: the catalogue itself downloads through this module.
+    from .content import get_content_catalog
+
+    return get_content_catalog()
+
+
+def get_agents() -> Any:
+    url = "https://valorant-api.com/v1/agents"
     return _request_json("GET", url, _valorant_headers())
 
 
-def get_weapon_by_puuid(puuid: str) -> Any:
-    url = f"https://valorant-api.com/v1/weapons/{puuid}"
+def get_weapons() -> Any:
+    url = "https://valorant-api.com/v1/weapons"
     return _request_json("GET", url, _valorant_headers())
 
 
@@ -103,12 +126,35 @@ def get_maps() -> Any:
     return _request_json("GET", url, _valorant_headers())
 
 
+def get_content_version() -> Any:
+    url = "https://valorant-api.com/v1/version"
+    return _request_json("GET", url, _valorant_headers())
+
+
+def get_agent_by_puuid(puuid: str) -> Any:
+    catalog = _content_catalog()
+    agent = catalog.agent(puuid)
+    if agent is not None:
+        return {"status": 200, "data": agent}
+    url = f"https://valorant-api.com/v1/agents/{puuid}"
+    payload = _request_json("GET", url, _valorant_headers())
+    catalog.remember("agents", payload.get("data") or {})
+    return payload
+
+
+def get_weapon_by_puuid(puuid: str) -> Any:
+    catalog = _content_catalog()
+    weapon = catalog.weapon(puuid)
+    if weapon is not None:
+        return {"status": 200, "data": weapon}
+    url = f"https://valorant-api.com/v1/weapons/{puuid}"
+    payload = _request_json("GET", url, _valorant_headers())
+    catalog.remember("weapons", payload.get("data") or {})
+    return payload
+
+
 def get_map_by_id(map_identifier: str) -> Optional[str]:
-    maps = get_maps().get("data", [])
-    for mapa in maps:
-        if mapa.get("mapUrl") == map_identifier:
-            return mapa.get("displayName")
-    return None
+    return _content_catalog().map_name(map_identifier)
 
 
 __all__ = [
@@ -122,8 +168,11 @@ __all__ = [
     "get_minimap_by_uuid",
     "get_teams",
     "get_team_by_id",
+    "get_agents",
+    "get_weapons",
+    "get_maps",
+    "get_content_version",
     "get_agent_by_puuid",
     "get_weapon_by_puuid",
-    "get_maps",
     "get_map_by_id",
 ]
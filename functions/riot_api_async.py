@@ -0,0 +1,149 @@
+"""asyncio variants of every call in :mod:`functions.riot_api`.
+
+Each coroutine runs the matching sync function in a worker thread, so it
+keeps using the pooled HTTP client, the match archive and the content
+catalogue. Concurrency is capped per event loop by a semaphore sized to the
+HTTP pool; valolytics calls wait on the shared token bucket inside the
+worker thread, so the loop itself never blocks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from . import riot_api
+from .http_client import DEFAULT_POOL_MAXSIZE
+from .match_store import get_match_archive
+
+_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(DEFAULT_POOL_MAXSIZE)
+        _SEMAPHORES[loop] = semaphore
+    return semaphore
+
+
+async def _call(fn: Callable[..., Any], *args: Any) -> Any:
+    async with _semaphore():
+        return await asyncio.to_thread(fn, *args)
+
+
+async def get_match_by_match_id_async(match_id: str, region: str) -> Any:
+    cached = await asyncio.to_thread(get_match_archive().get, match_id, region)
+    if cached is not None:
+        return cached
+    return await _call(riot_api.get_match_by_match_id, match_id, region)
+
+
+async def get_puuid_by_riotid_async(game_name: str, tag_line: str, region: str) -> Any:
+    return await _call(riot_api.get_puuid_by_riotid, game_name, tag_line, region)
+
+
+async def get_matchlist_by_puuid_async(puuid: str, region: str) -> Any:
+    return await _call(riot_api.get_matchlist_by_puuid, puuid, region)
+
+
+async def get_riotid_by_puuid_async(puuid: str, region: str) -> Any:
+    return await _call(riot_api.get_riotid_by_puuid, puuid, region)
+
+
+async def get_playerlocations_by_id_async(identifier: str, region: str) -> Any:
+    return await _call(riot_api.get_playerlocations_by_id, identifier, region)
+
+
+async def get_playerstats_by_id_async(identifier: str, region: str) -> Any:
+    return await _call(riot_api.get_playerstats_by_id, identifier, region)
+
+
+async def get_teamstats_by_id_async(identifier: str, region: str) -> Any:
+    return await _call(riot_api.get_teamstats_by_id, identifier, region)
+
+
+async def get_minimap_by_uuid_async(uuid: str) -> Any:
+    return await _call(riot_api.get_minimap_by_uuid, uuid)
+
+
+async def get_teams_async() -> Any:
+    return await _call(riot_api.get_teams)
+
+
+async def get_team_by_id_async(identifier: str) -> Any:
+    return await _call(riot_api.get_team_by_id, identifier)
+
+
+async def get_agents_async() -> Any:
+    return await _call(riot_api.get_agents)
+
+
+async def get_weapons_async() -> Any:
+    return await _call(riot_api.get_weapons)
+
+
+async def get_maps_async() -> Any:
+    return await _call(riot_api.get_maps)
+
+
+async def get_content_version_async() -> Any:
+    return await _call(riot_api.get_content_version)
+
+
+async def get_agent_by_puuid_async(puuid: str) -> Any:
+    return await _call(riot_api.get_agent_by_puuid, puuid)
+
+
+async def get_weapon_by_puuid_async(puuid: str) -> Any:
+    return await _call(riot_api.get_weapon_by_puuid, puuid)
+
+
+async def get_map_by_id_async(map_identifier: str) -> Optional[str]:
+    return await _call(riot_api.get_map_by_id, map_identifier)
+
+
+async def gather_matchlists(puuids: Mapping[str, str], region: str) -> Dict[str, Any]:
+    """Fetch matchlists for every ``name -> puuid`` pair concurrently.
+
+    Failed lookups map to the raised exception instead of aborting the batch,
+    so one bad account does not hide everyone else's data.
+    """
+    names = list(puuids)
+    results = await asyncio.gather(
+        *(get_matchlist_by_puuid_async(puuids[name], region) for name in names),
+        return_exceptions=True,
+    )
+    return dict(zip(names, results))
+
+
+def fetch_matchlists(puuids: Mapping[str, str], region: str) -> Dict[str, Any]:
+    """Blocking helper around :func:`gather_matchlists` for sync callers."""
+    return asyncio.run(gather_matchlists(puuids, region))
+
+
+__all__ = [
+    "get_match_by_match_id_async",
+    "get_puuid_by_riotid_async",
+    "get_matchlist_by_puuid_async",
+    "get_riotid_by_puuid_async",
+    "get_playerlocations_by_id_async",
+    "get_playerstats_by_id_async",
+    "get_teamstats_by_id_async",
+    "get_minimap_by_uuid_async",
+    "get_teams_async",
+    "get_team_by_id_async",
+    "get_agents_async",
+    "get_weapons_async",
+    "get_maps_async",
+    "get_content_version_async",
+    "get_agent_by_puuid_async",
+    "get_weapon_by_puuid_async",
+    "get_map_by_id_async",
+    "gather_matchlists",
+    "fetch_matchlists",
+]
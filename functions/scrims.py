@@ -0,0 +1,616 @@
+"""Parsed scrim sheet rows and the aggregations behind ``/scrims``.
+
+The sheet ('Scrim Day Insights!A3:K1100') is positional::
+
+    DATE | SCRIM TYPE | OPPONENT | MAP | RESULT | TOTAL SCORE | DEFENSE | ATTACK | DEF PISTOL | ATK PISTOL | ENEMY TEAM COMP
+
+with the date only written on the first row of each scrim day. :func:`parse_scrim_rows`
+walks the rows once, carries the date forward, drops header/VOD rows and rows
+without a valid date, and returns one :class:`ScrimRecord` per map played.
+
+:class:`ScrimStore` keeps the records sorted by date: a date window is two
+bisects and a slice, and each scrim-type filter gets its own pre-sorted
+partition. The store is built when the scrim cache (re)loads the sheet, so
+views never touch ``strptime``, column indexes or a full scan again.
+
+:class:`ScrimAggregate` computes every dashboard aggregate (map/side/pistol
+win rates, enemy agent win rates, tracked teams' comps, head-to-head) in one
+pass, and aggregates merge. The store keeps one per month and scrim-type
+filter, so a preset month is a lookup and a yearly baseline or custom range
+is a dozen merges plus a scan of the partial months at its edges.
+"""
+
+from __future__ import annotations
+
+import calendar
+import datetime
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+SCRIM_DATE_FORMAT = "%B %d, %Y"
+SCRIM_COLUMNS = (
+    "DATE",
+    "SCRIM TYPE",
+    "OPPONENT",
+    "MAP",
+    "RESULT",
+    "TOTAL SCORE",
+    "DEFENSE",
+    "ATTACK",
+    "DEF PISTOL",
+    "ATK PISTOL",
+    "ENEMY TEAM COMP",
+)
+SIDE_ROUNDS = 12
+TRACKED_TEAMS = ("KOI", "KC", "BBL", "GIANTX", "GentleMates", "FUT", "Liquid")
+
+_HEADER_MARKERS = ("VOD LINK", "NO VOD", "DATE")
+_MAX_TYPE_PARTITIONS = 32
+_TEAM_ALIASES = {"KarmineCorp": "KC", "Karmine Corp": "KC"}
+
+
+@dataclass(frozen=True)
+class ScrimRecord:
+    """One map of one scrim, parsed from a sheet row."""
+
+    date: datetime.date
+    date_label: str
+    scrim_type: str
+    opponent: str
+    map: str
+    result: str
+    def_won: int
+    atk_won: int
+    def_pistol: int
+    atk_pistol: int
+    comp: Tuple[str, ...]
+    comp_text: str
+
+    @property
+    def won(self) -> bool:
+        return self.result == "WON"
+
+
+def _cell(row: Sequence[Any], index: int) -> str:
+    if index >= len(row) or row[index] is None:
+        return ""
+    return str(row[index]).strip()
+
+
+def _count(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def normalize_opponent(name: str) -> str:
+    name = (name or "").strip()
+    return _TEAM_ALIASES.get(name, name)
+
+
+def parse_scrim_row(row: Sequence[Any], date_label: str) -> Optional[ScrimRecord]:
+    """Parse one row, ``date_label`` being its (forward-filled) date cell."""
+    try:
+        date = datetime.datetime.strptime(date_label, SCRIM_DATE_FORMAT).date()
+    except ValueError:
+        return None
+    map_name = _cell(row, 3)
+    if map_name.upper() == "MAP":
+        return None
+    comp_text = _cell(row, 10)
+    return ScrimRecord(
+        date=date,
+        date_label=date_label,
+        scrim_type=_cell(row, 1).lower(),
+        opponent=normalize_opponent(_cell(row, 2)),
+        map=map_name,
+        result=_cell(row, 4).upper(),
+        def_won=_count(_cell(row, 6)),
+        atk_won=_count(_cell(row, 7)),
+        def_pistol=_count(_cell(row, 8)),
+        atk_pistol=_count(_cell(row, 9)),
+        comp=tuple(sorted(agent.strip() for agent in comp_text.split(",") if agent.strip())),
+        comp_text=comp_text,
+    )
+
+
+def parse_scrim_rows(rows: Iterable[Sequence[Any]]) -> List[ScrimRecord]:
+    """Single pass over the sheet: carry dates forward and parse every map row."""
+    records: List[ScrimRecord] = []
+    last_date = ""
+    for row in rows:
+        if not row:
+            continue
+        first = _cell(row, 0)
+        if first:
+            last_date = first
+        if last_date in _HEADER_MARKERS:
+            continue
+        record = parse_scrim_row(row, last_date)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+def scrim_type_matches(scrim_type: Optional[str], value: str) -> bool:
+    """Whether a record's type belongs to the ``scrim_type`` filter (``all``/empty match everything)."""
+    if scrim_type in (None, "", "all"):
+        return True
+    if scrim_type in ("grey", "gray"):
+        return "grey" in value or "gray" in value
+    return scrim_type in value  # substring match to be resilient (e.g., "green scrim")
+
+
+def _type_filter(scrim_type: Optional[str]) -> str:
+    value = (scrim_type or "").strip().lower()
+    if value in ("", "all"):
+        return "all"
+    return "grey" if value == "gray" else value
+
+
+Month = Tuple[int, int]
+
+
+def _month_of(day: datetime.date) -> Month:
+    return (day.year, day.month)
+
+
+def _next_month(month: Month) -> Month:
+    year, number = month
+    return (year + 1, 1) if number == 12 else (year, number + 1)
+
+
+def month_bounds(month: Month) -> Tuple[datetime.date, datetime.date]:
+    """First and last day of ``(year, month)``."""
+    year, number = month
+    return datetime.date(year, number, 1), datetime.date(year, number, calendar.monthrange(year, number)[1])
+
+
+def _split_months(
+    start: datetime.date, end: datetime.date
+) -> Tuple[List[Month], List[Tuple[datetime.date, datetime.date]]]:
+    """Split ``start``..``end`` into the whole months it covers and the leftover day ranges."""
+    first = _month_of(start) if start.day == 1 else _next_month(_month_of(start))
+    last = _month_of(end)
+    months: List[Month] = []
+    month = first
+    # Compare months as tuples first: month_bounds() cannot build dates past 9999-12.
+    while month <= last and month_bounds(month)[1] <= end:
+        months.append(month)
+        month = _next_month(month)
+    if not months:
+        return [], [(start, end)] if start <= end else []
+    edges = []
+    if start < month_bounds(months[0])[0]:
+        edges.append((start, month_bounds(months[0])[0] - datetime.timedelta(days=1)))
+    if month_bounds(months[-1])[1] < end:
+        edges.append((month_bounds(months[-1])[1] + datetime.timedelta(days=1), end))
+    return months, edges
+
+
+class ScrimStore:
+    """Scrim records sorted by date, with a range index per scrim-type filter.
+
+    Records of the same day keep their sheet order. Partitions are built for
+    every type present in the sheet (plus ``grey``) up front; other filters
+    are built on first use and memoised.
+
+    Aggregates are kept per month and type filter. :meth:`aggregate` composes
+    any window from the snapshots of the months it covers plus a scan of the
+    partial months at its edges. Passing the ``previous`` store (see
+    :class:`ScrimStoreLoader`) carries its snapshots over: months whose
+    records are unchanged are reused as is, months that only gained rows
+    (usually the current one) are extended with the new rows, the rest are
+    rebuilt on demand.
+    """
+
+    def __init__(self, records: Iterable[ScrimRecord], previous: Optional["ScrimStore"] = None) -> None:
+        self.records: List[ScrimRecord] = sorted(records, key=lambda record: record.date)
+        self._lock = threading.Lock()
+        self._partitions: Dict[str, Tuple[List[ScrimRecord], List[datetime.date]]] = {
+            "all": (self.records, [record.date for record in self.records])
+        }
+        self._snapshots: Dict[Tuple[str, Month], Tuple[List[ScrimRecord], ScrimAggregate]] = {}
+        for value in {"grey", *(record.scrim_type for record in self.records)}:
+            if value:
+                self._partition(value)
+        if previous is not None:
+            self._adopt(previous)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]], previous: Optional["ScrimStore"] = None) -> "ScrimStore":
+        return cls(parse_scrim_rows(rows), previous)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[ScrimRecord]:
+        return iter(self.records)
+
+    @property
+    def latest_date(self) -> Optional[datetime.date]:
+        return self.records[-1].date if self.records else None
+
+    def _partition(self, scrim_type: Optional[str]) -> Tuple[List[ScrimRecord], List[datetime.date]]:
+        key = _type_filter(scrim_type)
+        partition = self._partitions.get(key)
+        if partition is not None:
+            return partition
+        records = [record for record in self.records if scrim_type_matches(key, record.scrim_type)]
+        partition = (records, [record.date for record in records])
+        with self._lock:
+            # Filters come from the query string: only keep a bounded number around.
+            if len(self._partitions) < _MAX_TYPE_PARTITIONS:
+                self._partitions.setdefault(key, partition)
+        return partition
+
+    def of_type(self, scrim_type: Optional[str]) -> List[ScrimRecord]:
+        """Every record matching the ``scrim_type`` filter, oldest first."""
+        return self._partition(scrim_type)[0]
+
+    def between(
+        self, start: datetime.date, end: datetime.date, scrim_type: Optional[str] = None
+    ) -> List[ScrimRecord]:
+        """Records dated ``start``..``end`` (inclusive) matching ``scrim_type``, oldest first."""
+        records, dates = self._partition(scrim_type)
+        return records[bisect_left(dates, start):bisect_right(dates, end)]
+
+    # ------------------------------------------------------------------
+    # Monthly snapshots
+    # ------------------------------------------------------------------
+    def _adopt(self, previous: "ScrimStore") -> None:
+        with previous._lock:
+            snapshots = list(previous._snapshots.items())
+        for (key, month), (old_records, old_aggregate) in snapshots:
+            if key not in self._partitions:
+                continue
+            records = self.between(*month_bounds(month), key)
+            if records == old_records:
+                self._snapshots[(key, month)] = (records, old_aggregate)
+            elif len(records) > len(old_records) and records[: len(old_records)] == old_records:
+                aggregate = ScrimAggregate().merge(old_aggregate)
+                for record in records[len(old_records):]:
+                    aggregate.add(record)
+                self._snapshots[(key, month)] = (records, aggregate)
+
+    def month_aggregate(self, month: Month, scrim_type: Optional[str] = None) -> "ScrimAggregate":
+        """Snapshot of one ``(year, month)`` for a type filter; treat it as read-only."""
+        key = _type_filter(scrim_type)
+        snapshot = self._snapshots.get((key, month))
+        if snapshot is not None:
+            return snapshot[1]
+        records = self.between(*month_bounds(month), key)
+        aggregate = ScrimAggregate.of(records)
+        if records and key in self._partitions:
+            with self._lock:
+                aggregate = self._snapshots.setdefault((key, month), (records, aggregate))[1]
+        return aggregate
+
+    def months(self) -> List[Month]:
+        """Every month from the first to the latest scrim."""
+        if not self.records:
+            return []
+        months = [_month_of(self.records[0].date)]
+        while months[-1] != _month_of(self.records[-1].date):
+            months.append(_next_month(months[-1]))
+        return months
+
+    @cached_property
+    def overall(self) -> "ScrimAggregate":
+        """Aggregate of the whole sheet, every scrim type; built once per store."""
+        aggregate = ScrimAggregate()
+        for month in self.months():
+            aggregate.merge(self.month_aggregate(month))
+        return aggregate
+
+    def aggregate(
+        self, windows: Mapping[str, Tuple[datetime.date, datetime.date]], scrim_type: Optional[str] = None
+    ) -> Dict[str, "ScrimAggregate"]:
+        """Aggregate named date windows (e.g. selection and baseline year), inclusive.
+
+        Whole months come from the monthly snapshots, which windows share;
+        only the days of partial months are scanned. Windows are first clamped
+        to the months that hold records, so open-ended dates cost nothing.
+        """
+        results = {}
+        if self.records:
+            first_day = month_bounds(_month_of(self.records[0].date))[0]
+            last_day = month_bounds(_month_of(self.records[-1].date))[1]
+        for name, (start, end) in windows.items():
+            if not self.records:
+                results[name] = ScrimAggregate()
+                continue
+            months, edges = _split_months(max(start, first_day), min(end, last_day))
+            aggregate = ScrimAggregate()
+            for month in months:
+                aggregate.merge(self.month_aggregate(month, scrim_type))
+            for low, high in edges:
+                for record in self.between(low, high, scrim_type):
+                    aggregate.add(record)
+            results[name] = aggregate
+        return results
+
+
+class ScrimStoreLoader:
+    """Sheet parser for the scrim cache that hands each new store its predecessor.
+
+    Snapshots of months that did not change survive a sheet refresh, so only
+    the months that gained or changed rows are aggregated again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last: Optional[ScrimStore] = None
+
+    def __call__(self, rows: Iterable[Sequence[Any]]) -> ScrimStore:
+        with self._lock:
+            previous = self._last
+        store = ScrimStore.from_rows(rows, previous)
+        with self._lock:
+            self._last = store
+        return store
+
+
+def _percent(part: float, whole: float) -> int:
+    return round(part / whole * 100) if whole else 0
+
+
+# ----------------------------------------------------------------------
+# Aggregation engine
+# ----------------------------------------------------------------------
+@dataclass
+class WinTally:
+    games: int = 0
+    wins: int = 0
+
+    def add(self, won: bool) -> None:
+        self.games += 1
+        if won:
+            self.wins += 1
+
+    def merge(self, other: "WinTally") -> None:
+        self.games += other.games
+        self.wins += other.wins
+
+
+@dataclass
+class MapTally:
+    """Results, side rounds and pistols won on one map."""
+
+    games: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    def_won: int = 0
+    atk_won: int = 0
+    def_pistol_won: int = 0
+    atk_pistol_won: int = 0
+
+    def add(self, record: ScrimRecord) -> None:
+        self.games += 1
+        if record.result == "WON":
+            self.wins += 1
+        elif record.result == "DRAW":
+            self.draws += 1
+        elif record.result == "LOST":
+            self.losses += 1
+        self.def_won += record.def_won
+        self.atk_won += record.atk_won
+        self.def_pistol_won += record.def_pistol
+        self.atk_pistol_won += record.atk_pistol
+
+    def merge(self, other: "MapTally") -> None:
+        self.games += other.games
+        self.wins += other.wins
+        self.draws += other.draws
+        self.losses += other.losses
+        self.def_won += other.def_won
+        self.atk_won += other.atk_won
+        self.def_pistol_won += other.def_pistol_won
+        self.atk_pistol_won += other.atk_pistol_won
+
+
+@dataclass
+class CompTally:
+    """One enemy composition played by a tracked team on one map."""
+
+    games: int = 0
+    wins: int = 0
+    dates: List[str] = field(default_factory=list)
+
+    def add(self, record: ScrimRecord) -> None:
+        self.games += 1
+        if record.won:
+            self.wins += 1
+        self.dates.append(record.date_label)
+
+    def merge(self, other: "CompTally") -> None:
+        self.games += other.games
+        self.wins += other.wins
+        self.dates.extend(other.dates)
+
+
+@dataclass
+class OpponentTally:
+    """Head-to-head record against one opponent."""
+
+    games: int = 0
+    wins: int = 0
+    last_date: Optional[datetime.date] = None
+    maps: Dict[str, WinTally] = field(default_factory=dict)
+    events: List[ScrimRecord] = field(default_factory=list)
+
+    def add(self, record: ScrimRecord) -> None:
+        self.games += 1
+        if record.won:
+            self.wins += 1
+        if self.last_date is None or record.date > self.last_date:
+            self.last_date = record.date
+        self.maps.setdefault(record.map, WinTally()).add(record.won)
+        self.events.append(record)
+
+    def merge(self, other: "OpponentTally") -> None:
+        self.games += other.games
+        self.wins += other.wins
+        if other.last_date is not None and (self.last_date is None or other.last_date > self.last_date):
+            self.last_date = other.last_date
+        for map_name, tally in other.maps.items():
+            self.maps.setdefault(map_name, WinTally()).merge(tally)
+        self.events.extend(other.events)
+
+
+class ScrimAggregate:
+    """Every ``/scrims`` aggregate, accumulated in one pass over scrim records.
+
+    Holds per-map tallies (results, sides, pistols), per (map, enemy agent)
+    tallies, enemy compositions of the tracked teams and head-to-head
+    records. :meth:`merge` folds another aggregate in without sharing any of
+    its mutable state, so partial aggregates can be combined freely.
+    """
+
+    def __init__(self) -> None:
+        self.maps: Dict[str, MapTally] = {}
+        self.agents: Dict[Tuple[str, str], WinTally] = {}
+        self.comps: Dict[Tuple[str, str, Tuple[str, ...]], CompTally] = {}
+        self.opponents: Dict[str, OpponentTally] = {}
+
+    @classmethod
+    def of(cls, records: Iterable[ScrimRecord]) -> "ScrimAggregate":
+        aggregate = cls()
+        for record in records:
+            aggregate.add(record)
+        return aggregate
+
+    def add(self, record: ScrimRecord) -> None:
+        self.maps.setdefault(record.map, MapTally()).add(record)
+        if record.map:
+            for agent in record.comp_text.split(", ") if record.comp_text else ():
+                self.agents.setdefault((record.map, agent), WinTally()).add(record.won)
+            if record.opponent:
+                self.opponents.setdefault(record.opponent, OpponentTally()).add(record)
+        if record.opponent in TRACKED_TEAMS:
+            self.comps.setdefault((record.opponent, record.map, record.comp), CompTally()).add(record)
+
+    def merge(self, other: "ScrimAggregate") -> "ScrimAggregate":
+        for map_name, tally in other.maps.items():
+            self.maps.setdefault(map_name, MapTally()).merge(tally)
+        for key, tally in other.agents.items():
+            self.agents.setdefault(key, WinTally()).merge(tally)
+        for key, tally in other.comps.items():
+            self.comps.setdefault(key, CompTally()).merge(tally)
+        for opponent, tally in other.opponents.items():
+            self.opponents.setdefault(opponent, OpponentTally()).merge(tally)
+        return self
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+    def win_stats(self) -> List[Dict[str, Any]]:
+        """Per-map results, side round win rates and pistol win rates."""
+        return [
+            {
+                "map": map_name,
+                "games": data.games,
+                "wins": data.wins,
+                "draws": data.draws,
+                "losses": data.losses,
+                "win_rate": _percent(data.wins, data.games),
+                "def_winrate": _percent(data.def_won, data.games * SIDE_ROUNDS),
+                "atk_winrate": _percent(data.atk_won, data.games * SIDE_ROUNDS),
+                "def_pistol": _percent(data.def_pistol_won, data.games),
+                "atk_pistol": _percent(data.atk_pistol_won, data.games),
+            }
+            for map_name, data in self.maps.items()
+        ]
+
+    def agent_winrates(self) -> List[Dict[str, Any]]:
+        """Win rate per (map, enemy agent), sorted by map then ascending win rate."""
+        results = [
+            {
+                "MAP": map_name,
+                "ENEMY TEAM COMP": agent,
+                "total_games": tally.games,
+                "wins": tally.wins,
+                "win_rate": tally.wins / tally.games * 100 if tally.games else 0,
+            }
+            for (map_name, agent), tally in self.agents.items()
+        ]
+        results.sort(key=lambda x: (x["MAP"], x["win_rate"]))
+        return results
+
+    def scrim_teams(self) -> Dict[str, Dict[str, Any]]:
+        """Enemy compositions per tracked team and map, with games, wins and dates."""
+        teams: Dict[str, Dict[str, Any]] = {}
+        for (team, map_name, comp), tally in self.comps.items():
+            maps = teams.setdefault(team, {"maps": {}})["maps"]
+            maps.setdefault(map_name, {"comps": {}})["comps"][comp] = {
+                "games": tally.games,
+                "wins": tally.wins,
+                "dates": list(tally.dates),
+            }
+        return teams
+
+    def head_to_head(self) -> List[Dict[str, Any]]:
+        """Head-to-head results by opponent (and per-map breakdown).
+
+        Returns a list of dicts, most played opponent first::
+
+          {
+            'opponent': str,
+            'games': int,
+            'wins': int,
+            'wr': int,  # percentage
+            'last_played': 'Month D, YYYY',
+            'last_sort': 'YYYY-MM-DD',
+            'maps': [ {'map': str, 'games': int, 'wins': int, 'wr': int}, ... ],
+            'events': [ {'date': str, 'date_sort': str, 'map': str, 'comp': str}, ... ]  # newest first
+          }
+        """
+        summary = []
+        for opp, rec in self.opponents.items():
+            maps_list = [
+                {"map": m, "games": md.games, "wins": md.wins, "wr": _percent(md.wins, md.games)}
+                for m, md in rec.maps.items()
+            ]
+            maps_list.sort(key=lambda x: (-x["games"], x["map"]))
+            events = sorted(rec.events, key=lambda e: e.date, reverse=True)
+            summary.append({
+                "opponent": opp,
+                "games": rec.games,
+                "wins": rec.wins,
+                "wr": _percent(rec.wins, rec.games),
+                "last_played": rec.last_date.strftime(SCRIM_DATE_FORMAT),
+                "last_sort": rec.last_date.isoformat(),
+                "maps": maps_list,
+                "events": [
+                    {
+                        "date": e.date.strftime(SCRIM_DATE_FORMAT),
+                        "date_sort": e.date.isoformat(),
+                        "map": e.map,
+                        "comp": e.comp_text,
+                    }
+                    for e in events
+                ],
+            })
+
+        summary.sort(key=lambda x: (-x["games"], x["opponent"]))
+        return summary
+
+
+__all__ = [
+    "SCRIM_COLUMNS",
+    "SCRIM_DATE_FORMAT",
+    "ScrimAggregate",
+    "ScrimRecord",
+    "ScrimStore",
+    "ScrimStoreLoader",
+    "month_bounds",
+    "normalize_opponent",
+    "parse_scrim_row",
+    "parse_scrim_rows",
+    "scrim_type_matches",
+]
@@ -0,0 +1,149 @@
+"""Precomputed team × event × agent aggregates over the player stats dataset.
+
+Every cell holds summed counts (rounds, kills, deaths, assists, first
+kills/deaths), the round-weighted ACS and ADR, the derived per-round rates
+and the number of distinct players. Cells are built from the per-agent rows
+(``Agent == "Overall"`` rows are those summed already) and rolled up over
+team and/or agent, written as ``"*"``. Events are never summed together: they
+overlap (``All``, ``... (All)``), so every cell belongs to exactly one event.
+
+Lookups of a cell, or of all cells along one dimension ("every team at
+Masters Toronto"), are dictionary hits.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .columnar import ColumnarDataset
+from .player_stats import get_player_stats_table
+
+ALL = "*"
+CUBE_DIMENSIONS = ("Event", "Team", "Agent")
+OVERALL_AGENT = "Overall"
+
+_SUM_COLUMNS = ("Rounds", "Kills", "Deaths", "Assists", "First Kills", "First Deaths")
+_WEIGHTED_COLUMNS = ("ACS", "ADR")
+# Grouping sets: the event is always kept.
+_GROUPINGS = (("Event", "Team", "Agent"), ("Event", "Team"), ("Event", "Agent"), ("Event",))
+
+Cell = Dict[str, Any]
+CellKey = Tuple[str, str, str]
+
+
+def _key(event: str, team: str = ALL, agent: str = ALL) -> CellKey:
+    return (str(event).strip().lower(), str(team).strip().lower(), str(agent).strip().lower())
+
+
+def _floats(dataset: ColumnarDataset, header: str, rows: np.ndarray) -> np.ndarray:
+    if header not in dataset or not dataset.is_numeric(header):
+        return np.zeros(len(rows))
+    return np.nan_to_num(dataset.column(header)[rows].astype(np.float64), nan=0.0)
+
+
+def _grouped_cells(dataset: ColumnarDataset, rows: np.ndarray, dims: Sequence[str]) -> List[Cell]:
+    codes = np.stack([dataset.column(dim)[rows] for dim in dims], axis=1)
+    groups, inverse = np.unique(codes, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    count = len(groups)
+
+    def total(values: np.ndarray) -> np.ndarray:
+        return np.bincount(inverse, weights=values, minlength=count)
+
+    def ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+        return np.divide(num, den, out=np.zeros(count), where=den != 0)
+
+    rounds_in = _floats(dataset, "Rounds", rows)
+    sums = {header: total(_floats(dataset, header, rows)) for header in _SUM_COLUMNS}
+    rounds = sums["Rounds"]
+    metrics = {header: ratio(total(_floats(dataset, header, rows) * rounds_in), rounds) for header in _WEIGHTED_COLUMNS}
+    fk, fd = sums["First Kills"], sums["First Deaths"]
+    metrics.update({
+        "KD": np.where(sums["Deaths"] != 0, ratio(sums["Kills"], sums["Deaths"]), sums["Kills"]),
+        "KPR": ratio(sums["Kills"], rounds),
+        "DPR": ratio(sums["Deaths"], rounds),
+        "APR": ratio(sums["Assists"], rounds),
+        "FKPR": ratio(fk, rounds),
+        "FDPR": ratio(fd, rounds),
+        "FKWR%": ratio(fk * 100, fk + fd),
+    })
+    # Distinct players per group: unique (group, name) pairs counted per group.
+    pairs = np.unique(np.stack([inverse, dataset.column("Name")[rows]], axis=1), axis=0)
+    players = np.bincount(pairs[:, 0], minlength=count)
+
+    labels = {dim: dataset.categories(dim) or [] for dim in dims}
+    cells: List[Cell] = []
+    for g in range(count):
+        cell: Cell = {dim: ALL for dim in CUBE_DIMENSIONS}
+        for i, dim in enumerate(dims):
+            cell[dim] = labels[dim][groups[g, i]]
+        cell["Players"] = int(players[g])
+        cell.update({header: int(values[g]) for header, values in sums.items()})
+        cell.update({header: float(values[g]) for header, values in metrics.items()})
+        cells.append(cell)
+    return cells
+
+
+class StatsCube:
+    """Aggregates keyed by ``(event, team, agent)``; ``"*"`` means all."""
+
+    def __init__(self, cells: Sequence[Cell]) -> None:
+        self._cells: Dict[CellKey, Cell] = {}
+        self._slices: Dict[Tuple[str, CellKey], List[Cell]] = {}
+        for cell in cells:
+            key = _key(cell["Event"], cell["Team"], cell["Agent"])
+            self._cells[key] = cell
+            for i, dim in enumerate(CUBE_DIMENSIONS):
+                if key[i] != ALL:
+                    parent = key[:i] + (ALL,) + key[i + 1:]
+                    self._slices.setdefault((dim, parent), []).append(cell)
+        for members in self._slices.values():
+            members.sort(key=lambda cell: cell["Rounds"], reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    @classmethod
+    def build(cls, dataset: ColumnarDataset) -> "StatsCube":
+        agents = dataset.categories("Agent") or []
+        overall = [code for code, agent in enumerate(agents) if agent.lower() == OVERALL_AGENT.lower()]
+        rows = np.flatnonzero(~np.isin(dataset.column("Agent"), overall))
+        cells: List[Cell] = []
+        for dims in _GROUPINGS:
+            cells.extend(_grouped_cells(dataset, rows, dims))
+        return cls(cells)
+
+    def cell(self, event: str, team: str = ALL, agent: str = ALL) -> Optional[Cell]:
+        """One aggregate; team and/or agent may be ``"*"``."""
+        return self._cells.get(_key(event, team, agent))
+
+    def slice(self, by: str, event: str = ALL, team: str = ALL, agent: str = ALL) -> List[Cell]:
+        """Every cell along ``by`` (``Event``, ``Team`` or ``Agent``) with the other dimensions fixed.
+
+        The ``by`` dimension's own argument is ignored. Cells come busiest
+        (most rounds) first. Raises ``ValueError`` for an unknown dimension.
+        """
+        lookup = {dim.lower(): dim for dim in CUBE_DIMENSIONS}
+        dim = lookup.get(str(by).strip().lower())
+        if dim is None:
+            raise ValueError(f"Cannot slice by {by!r}; use one of {', '.join(CUBE_DIMENSIONS)}.")
+        key = list(_key(event, team, agent))
+        key[CUBE_DIMENSIONS.index(dim)] = ALL
+        return list(self._slices.get((dim, tuple(key)), ()))
+
+
+@lru_cache()
+def get_stats_cube() -> StatsCube:
+    """Return the process-wide cube over ``static/dataset_players.json``."""
+    return StatsCube.build(get_player_stats_table().dataset)
+
+
+__all__ = [
+    "ALL",
+    "CUBE_DIMENSIONS",
+    "StatsCube",
+    "get_stats_cube",
+]
@@ -0,0 +1,221 @@
+"""Persistent cache of the vlr.gg pages scraped for pick & bans.
+
+``help_scrape`` needs a team's match list and the veto line
+(``match-header-note``) of every match in the selected events. Finished
+matches never change, so the parsed veto of each match page is stored once
+under ``data/vlr/matches`` keyed by the match URL and only matches not seen
+before are downloaded. The team matches page is revalidated with
+``If-None-Match`` / ``If-Modified-Since``: on ``304`` the cached list of match
+links is reused, and if vlr.gg is unreachable the last copy is served.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+from bs4 import BeautifulSoup
+
+from .config import PROJECT_ROOT
+from .http_client import HttpClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+VLR_BASE_URL = "https://www.vlr.gg"
+VLR_CACHE_DIR = PROJECT_ROOT / "data" / "vlr"
+
+try:
+    VLR_TIMEOUT_SECONDS = max(1.0, float(os.getenv("VLR_TIMEOUT_SECONDS", "15")))
+except ValueError:
+    VLR_TIMEOUT_SECONDS = 15.0
+
+try:
+    VLR_FETCH_WORKERS = max(1, int(os.getenv("VLR_FETCH_WORKERS", "4")))
+except ValueError:
+    VLR_FETCH_WORKERS = 4
+
+Veto = List[str]
+
+
+def match_url(href: str) -> str:
+    return href if href.startswith("http") else f"{VLR_BASE_URL}{href}"
+
+
+def parse_team_match_links(html: str) -> List[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    return [item["href"] for item in soup.find_all("a", class_="wf-card fc-flex m-item")]
+
+
+def parse_match_veto(html: str) -> Optional[Veto]:
+    """The ``;``-separated veto entries of a match page, None when it has none (yet)."""
+    notes = BeautifulSoup(html, "html.parser").find_all(class_="match-header-note")
+    if not notes:
+        return None
+    return notes[0].text.split(";")
+
+
+class VlrCache:
+    """Team match lists (revalidated) and match vetoes (stored for good) from vlr.gg."""
+
+    def __init__(
+        self,
+        root: Path = VLR_CACHE_DIR,
+        *,
+        client: Optional[HttpClient] = None,
+        timeout: float = VLR_TIMEOUT_SECONDS,
+        max_workers: int = VLR_FETCH_WORKERS,
+    ) -> None:
+        self.root = Path(root)
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._client = client
+        self._lock = threading.Lock()
+        self._vetoes: Dict[str, Veto] = {}
+
+    @property
+    def client(self) -> HttpClient:
+        return self._client or get_http_client()
+
+    # ------------------------------------------------------------------
+    # Storage helpers
+    # ------------------------------------------------------------------
+    def _team_path(self, team_id: int) -> Path:
+        return self.root / "teams" / f"{team_id}.json"
+
+    def _match_path(self, url: str) -> Path:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.root / "matches" / digest[:2] / f"{digest}.json"
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable vlr.gg cache entry %s: %s", path, exc)
+            return None
+
+    @staticmethod
+    def _write(path: Path, payload: Dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(payload, handle, ensure_ascii=False)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def team_match_links(self, team_id: int) -> List[str]:
+        """Match links (``/<id>/<slug>``) listed on the team's matches page."""
+        url = f"{VLR_BASE_URL}/team/matches/{team_id}"
+        path = self._team_path(team_id)
+        cached = self._read(path)
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            response = self.client.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as exc:
+            if cached is None:
+                raise
+            logger.warning("vlr.gg unreachable, using the cached match list of team %s: %s", team_id, exc)
+            return cached["links"]
+        if response.status_code == 304 and cached is not None:
+            return cached["links"]
+        if response.status_code != 200:
+            logger.warning("vlr.gg answered %s for %s", response.status_code, url)
+            return cached["links"] if cached is not None else []
+
+        links = parse_team_match_links(response.text)
+        self._write(
+            path,
+            {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "links": links,
+            },
+        )
+        return links
+
+    def match_veto(self, href: str) -> Optional[Veto]:
+        """Veto entries of one match, downloaded only the first time it is seen.
+
+        Returns None (the match is skipped) when the page has no veto yet or
+        cannot be fetched.
+        """
+        url = match_url(href)
+        with self._lock:
+            veto = self._vetoes.get(url)
+        if veto is not None:
+            return veto
+        cached = self._read(self._match_path(url))
+        if cached is not None:
+            veto = cached["veto"]
+        else:
+            try:
+                response = self.client.get(url, timeout=self.timeout)
+            except requests.RequestException as exc:
+                # Skip this match for now; it is fetched again next time.
+                logger.warning("Could not fetch %s from vlr.gg: %s", url, exc)
+                return None
+            if response.status_code != 200:
+                logger.warning("vlr.gg answered %s for %s", response.status_code, url)
+                return None
+            veto = parse_match_veto(response.text)
+            if veto is None:
+                # Not played yet: nothing worth keeping, look again next time.
+                return None
+            self._write(self._match_path(url), {"url": url, "veto": veto})
+        with self._lock:
+            self._vetoes[url] = veto
+        return veto
+
+    def match_vetoes(self, hrefs: Sequence[str]) -> Dict[str, Veto]:
+        """Vetoes of ``hrefs`` (those that have one), new matches fetched concurrently."""
+        hrefs = list(dict.fromkeys(hrefs))
+        if len(hrefs) <= 1 or self.max_workers <= 1:
+            results = [self.match_veto(href) for href in hrefs]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(hrefs)), thread_name_prefix="vlr-fetch"
+            ) as executor:
+                results = list(executor.map(self.match_veto, hrefs))
+        return {href: veto for href, veto in zip(hrefs, results) if veto is not None}
+
+
+@lru_cache()
+def get_vlr_cache() -> VlrCache:
+    """Return the process-wide vlr.gg cache."""
+    return VlrCache()
+
+
+__all__ = [
+    "VLR_CACHE_DIR",
+    "VlrCache",
+    "get_vlr_cache",
+    "parse_match_veto",
+    "parse_team_match_links",
+]
@@ -0,0 +1,207 @@
+"""Periodic precomputation of the rankeds tables.
+
+``/rankeds`` used to sync every tracked player's matchlist inside the request.
+Workers now run :func:`run_rankeds_refresh_job` on a fixed cadence and the
+page only reads the precomputed tables (plus their age).
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import redis
+from redis.exceptions import RedisError
+from rq import Queue
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+from rq.utils import utcnow
+
+from functions.rankeds import extract_match_stats, players, refresh_rankeds_tables, seconds_since_refresh
+
+logger = logging.getLogger(__name__)
+
+RANKEDS_QUEUE = "rankeds"
+RANKEDS_REFRESH_JOB_ID = "rankeds-refresh"
+_ACTIVE_STATUSES = {"queued", "started", "deferred", "scheduled"}
+
+# In-process fallback of the KDA extract jobs when Redis is unavailable.
+_KDA_THREADS: Dict[Tuple[str, str], threading.Thread] = {}
+_KDA_FINISHED: Dict[Tuple[str, str], float] = {}
+_KDA_LOCK = threading.Lock()
+
+try:
+    RANKEDS_REFRESH_SECONDS = max(60, int(os.getenv("RANKEDS_REFRESH_SECONDS", "900")))
+except ValueError:
+    RANKEDS_REFRESH_SECONDS = 900
+
+try:
+    RANKEDS_RETRY_SECONDS = max(30, int(os.getenv("RANKEDS_RETRY_SECONDS", "120")))
+except ValueError:
+    RANKEDS_RETRY_SECONDS = 120
+
+
+def run_rankeds_refresh_job() -> dict:
+    """Background task: sync matchlists and rewrite the precomputed tables."""
+    status = refresh_rankeds_tables()
+    logger.info("Rankeds tables refreshed in %ss", status["duration_seconds"])
+    return status
+
+
+def run_kda_extract_job(start_date: str, end_date: str) -> dict:
+    """Background task: fetch the missing match extracts behind the K/D of a custom window."""
+    stored = extract_match_stats(
+        players, datetime.date.fromisoformat(start_date), datetime.date.fromisoformat(end_date)
+    )
+    logger.info("Stored %s KDA extracts for %s..%s", stored, start_date, end_date)
+    return {"start_date": start_date, "end_date": end_date, "stored": stored}
+
+
+def enqueue_kda_extract(redis_conn: redis.Redis, start_date: datetime.date, end_date: datetime.date) -> Optional[Job]:
+    """Queue the extracts of ``start_date``..``end_date`` unless that window was already handled.
+
+    Returns the queued or running job. Returns None when a job for the same
+    window finished or failed within the last ``RANKEDS_REFRESH_SECONDS``, so
+    games that cannot be fetched are not retried on every page view.
+    """
+    job_id = f"rankeds-kda-{start_date.isoformat()}-{end_date.isoformat()}"
+    try:
+        existing = Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        existing = None
+    if existing is not None:
+        return existing if existing.get_status() in _ACTIVE_STATUSES else None
+    queue = Queue(RANKEDS_QUEUE, connection=redis_conn, default_timeout=RANKEDS_REFRESH_SECONDS)
+    return queue.enqueue(
+        run_kda_extract_job,
+        start_date.isoformat(),
+        end_date.isoformat(),
+        job_id=job_id,
+        result_ttl=RANKEDS_REFRESH_SECONDS,
+        failure_ttl=RANKEDS_REFRESH_SECONDS,
+    )
+
+
+def start_kda_extract_thread(start_date: datetime.date, end_date: datetime.date) -> bool:
+    """Run the extracts of ``start_date``..``end_date`` on a daemon thread (no Redis).
+
+    Mirrors :func:`enqueue_kda_extract`: returns True while a thread for the
+    window is running, False when one finished within the last
+    ``RANKEDS_REFRESH_SECONDS``.
+    """
+    key = (start_date.isoformat(), end_date.isoformat())
+    now = time.monotonic()
+    with _KDA_LOCK:
+        thread = _KDA_THREADS.get(key)
+        if thread is not None:
+            return True
+        for window, finished_at in list(_KDA_FINISHED.items()):
+            if now - finished_at >= RANKEDS_REFRESH_SECONDS:
+                del _KDA_FINISHED[window]
+        if key in _KDA_FINISHED:
+            return False
+
+        def run() -> None:
+            try:
+                run_kda_extract_job(*key)
+            except Exception:
+                logger.exception("KDA extracts for %s..%s failed", *key)
+            finally:
+                with _KDA_LOCK:
+                    _KDA_THREADS.pop(key, None)
+                    _KDA_FINISHED[key] = time.monotonic()
+
+        thread = threading.Thread(target=run, name=f"rankeds-kda-{key[0]}-{key[1]}", daemon=True)
+        _KDA_THREADS[key] = thread
+        thread.start()
+        return True
+
+
+def retry_delay(failures: int) -> float:
+    """Back-off after ``failures`` consecutive failed refreshes, capped at the refresh interval."""
+    return min(RANKEDS_REFRESH_SECONDS, RANKEDS_RETRY_SECONDS * 2 ** max(0, failures - 1))
+
+
+def enqueue_rankeds_refresh(redis_conn: redis.Redis) -> Optional[Job]:
+    """Queue a refresh unless one is already waiting or running.
+
+    A failed refresh leaves the status file untouched, so the tables still
+    look due; the failed job is kept (``failure_ttl``) and no new one is
+    queued until :func:`retry_delay` has passed since it ended, doubling
+    with every consecutive failure.
+    """
+    try:
+        existing = Job.fetch(RANKEDS_REFRESH_JOB_ID, connection=redis_conn)
+    except NoSuchJobError:
+        existing = None
+    failures = 0
+    if existing is not None:
+        status = existing.get_status()
+        if status in _ACTIVE_STATUSES:
+            return None
+        if status == "failed":
+            failures = int(existing.meta.get("failures", 0)) + 1
+            ended_at = existing.ended_at
+            if ended_at is not None and (utcnow() - ended_at).total_seconds() < retry_delay(failures):
+                return None
+        existing.delete()
+    queue = Queue(RANKEDS_QUEUE, connection=redis_conn, default_timeout=RANKEDS_REFRESH_SECONDS)
+    return queue.enqueue(
+        run_rankeds_refresh_job,
+        job_id=RANKEDS_REFRESH_JOB_ID,
+        meta={"failures": failures},
+        result_ttl=RANKEDS_REFRESH_SECONDS,
+        # Outlive the longest back-off so the failure count is not lost.
+        failure_ttl=2 * RANKEDS_REFRESH_SECONDS,
+    )
+
+
+def refresh_is_due(interval: float = RANKEDS_REFRESH_SECONDS) -> bool:
+    age = seconds_since_refresh()
+    return age is None or age >= interval
+
+
+def start_rankeds_scheduler(
+    redis_conn: redis.Redis,
+    *,
+    interval: float = RANKEDS_REFRESH_SECONDS,
+    poll_seconds: float = 60.0,
+) -> threading.Thread:
+    """Start a daemon thread that enqueues a refresh whenever the tables go stale.
+
+    Safe to run in several worker processes: the fixed job id means at most
+    one refresh is queued or running at a time.
+    """
+
+    def loop() -> None:
+        while True:
+            try:
+                if refresh_is_due(interval):
+                    enqueue_rankeds_refresh(redis_conn)
+            except RedisError as exc:
+                logger.warning("Could not schedule rankeds refresh: %s", exc)
+            time.sleep(poll_seconds)
+
+    thread = threading.Thread(target=loop, name="rankeds-scheduler", daemon=True)
+    thread.start()
+    return thread
+
+
+__all__ = [
+    "RANKEDS_QUEUE",
+    "RANKEDS_REFRESH_JOB_ID",
+    "RANKEDS_REFRESH_SECONDS",
+    "RANKEDS_RETRY_SECONDS",
+    "enqueue_kda_extract",
+    "enqueue_rankeds_refresh",
+    "refresh_is_due",
+    "retry_delay",
+    "run_kda_extract_job",
+    "run_rankeds_refresh_job",
+    "start_kda_extract_thread",
+    "start_rankeds_scheduler",
+]
@@ -0,0 +1,75 @@
+"""RQ job that builds an opponent's ranked profile for ``/search_player``.
+
+Progress is published through an :class:`AnalyticalJobStore` in the
+``search`` namespace, so the search page can stream it over SSE exactly like
+the analytical report generator. Finished profiles are cached in Redis for
+``PROFILE_TTL_SECONDS`` and shared by every web and worker process.
+"""
+
+from __future__ import annotations
+
+import json
+import traceback
+from typing import Any, Dict, Optional
+
+import redis
+
+from functions.ranked_profile import PROFILE_TTL_SECONDS, build_ranked_profile, resolve_puuid
+from services.analytical_jobs import AnalyticalJobStore, get_redis_connection, utc_now_iso
+
+SEARCH_QUEUE = "player-search"
+SEARCH_NAMESPACE = "search"
+_PROFILE_KEY_PREFIX = "search:profiles:"
+
+
+def profile_cache_key(data_player: Dict[str, Any]) -> str:
+    return f"{_PROFILE_KEY_PREFIX}{data_player['gameName']}#{data_player['tagLine']}".lower()
+
+
+def get_cached_profile(redis_conn: redis.Redis, data_player: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return ``{"ranked_data": ..., "last_day": ...}`` if a fresh profile is cached."""
+    raw = redis_conn.get(profile_cache_key(data_player))
+    if raw is None:
+        return None
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    return json.loads(raw)
+
+
+def run_search_player_job(job_id: str, *, player_name: str, data_player: Dict[str, Any]) -> dict:
+    """Background task that builds the profile and streams progress."""
+    redis_conn = get_redis_connection()
+    store = AnalyticalJobStore(redis_conn, namespace=SEARCH_NAMESPACE)
+
+    def emit_progress(message: str) -> None:
+        store.append_event(job_id, "progress", {"message": message})
+
+    store.update_status(job_id, "started")
+    emit_progress(f"Looking up {player_name}.")
+    try:
+        puuid = resolve_puuid(data_player)
+        ranked_data, last_day = build_ranked_profile(
+            puuid,
+            data_player["region_matchlist"],
+            progress_callback=emit_progress,
+        )
+        result = {"ranked_data": ranked_data, "last_day": last_day}
+        redis_conn.set(profile_cache_key(data_player), json.dumps(result), ex=max(1, PROFILE_TTL_SECONDS))
+        store.merge_meta(job_id, {"result": result, "completed_at": utc_now_iso()})
+        store.append_event(job_id, "completed", {"message": "Ranked data ready.", "result": result})
+        store.update_status(job_id, "finished")
+        return result
+    except Exception as exc:  # pragma: no cover - defensive logging
+        message = f"Could not load ranked data: {exc}"
+        store.append_event(job_id, "error", {"message": message, "traceback": traceback.format_exc()})
+        store.update_status(job_id, "failed", error=message)
+        raise
+
+
+__all__ = [
+    "SEARCH_NAMESPACE",
+    "SEARCH_QUEUE",
+    "get_cached_profile",
+    "profile_cache_key",
+    "run_search_player_job",
+]
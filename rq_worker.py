@@ -29,14 +29,19 @@ if str(PROJECT_ROOT) not in sys.path:
 
 from rq import Connection, Worker  # noqa: E402  (import after sys.path tweak)
 
+from jobs.rankeds_job import RANKEDS_QUEUE, start_rankeds_scheduler  # noqa: E402
+from jobs.search_player_job import SEARCH_QUEUE  # noqa: E402
 from services.analytical_jobs import get_redis_connection  # noqa: E402
 
-DEFAULT_QUEUES: Sequence[str] = ("analytical-reports",)
+DEFAULT_QUEUES: Sequence[str] = (SEARCH_QUEUE, "analytical-reports", RANKEDS_QUEUE)
 
 
 def run_worker(queue_names: Sequence[str]) -> None:
     """Start an RQ worker bound to the provided queues."""
     redis_conn = get_redis_connection()
+    if RANKEDS_QUEUE in queue_names:
+        # Keep the precomputed rankeds tables warm while this worker runs.
+        start_rankeds_scheduler(redis_conn)
     with Connection(redis_conn):
         worker = Worker(list(queue_names))
         worker.work()
@@ -49,7 +54,7 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
     parser.add_argument(
         "queues",
         nargs="*",
-        help="The queues to listen on (defaults to analytical-reports).",
+        help="The queues to listen on (defaults to player-search, analytical-reports and rankeds).",
     )
     return parser.parse_args(argv)
 
@@ -34,12 +34,19 @@ class AnalyticalJobKeys:
 class AnalyticalJobStore:
     """Persist and stream analytical report job progress via Redis."""
 
-    def __init__(self, redis_conn: redis.Redis, *, log_limit: int = LOG_LENGTH_SOFT_LIMIT) -> None:
+    def __init__(
+        self,
+        redis_conn: redis.Redis,
+        *,
+        log_limit: int = LOG_LENGTH_SOFT_LIMIT,
+        namespace: str = "analytical",
+    ) -> None:
         self.redis = redis_conn
         self.log_limit = log_limit
+        self.namespace = namespace
 
     def keys(self, job_id: str) -> AnalyticalJobKeys:
-        base = f"analytical:jobs:{job_id}"
+        base = f"{self.namespace}:jobs:{job_id}"
         return AnalyticalJobKeys(
             base=base,
             log=f"{base}:log",
@@ -61,17 +68,22 @@ class AnalyticalJobStore:
         created_by: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Reset job state and store initial metadata."""
+        return self.create(
+            job_id,
+            created_by=created_by,
+            team_tag=team_tag,
+            match_count=match_count,
+            share_email=share_email,
+        )
+
+    def create(self, job_id: str, *, created_by: Optional[str] = None, **fields: Any) -> Dict[str, Any]:
+        """Reset job state and store ``fields`` as the initial metadata of a queued job."""
         keys = self.keys(job_id)
         created_at = utc_now_iso()
-        meta: Dict[str, Any] = {
-            "job_id": job_id,
-            "status": "queued",
-            "team_tag": team_tag,
-            "match_count": match_count,
-            "share_email": share_email,
-            "created_at": created_at,
-            "updated_at": created_at,
-        }
+        meta: Dict[str, Any] = {"job_id": job_id, "status": "queued"}
+        meta.update(fields)
+        meta["created_at"] = created_at
+        meta["updated_at"] = created_at
         if created_by:
             meta["created_by"] = created_by
 
@@ -0,0 +1,307 @@
+"""Response compression and conditional-request handling for the Flask app.
+
+:func:`init_http_caching` installs two pieces:
+
+* an ``after_request`` hook that gives every buffered ``GET``/``HEAD`` 200
+  response a strong ``ETag`` (SHA-1 of the body, suffixed with the content
+  coding), answers matching ``If-None-Match`` / ``If-Modified-Since`` with
+  ``304 Not Modified`` and otherwise compresses text-like bodies with brotli
+  (when the ``brotli`` package is installed) or gzip;
+* a wrapper around the ``static`` view that serves precompressed ``.br`` /
+  ``.gz`` variants of static JSON/JS/CSS/SVG. Variants are built under
+  ``data/precompressed`` by a background thread (queued at startup and
+  whenever a request finds one missing or stale), or at deploy time with
+  ``python -m services.http_cache``. Until a variant exists the file is
+  served with a fast on-the-fly gzip instead.
+
+Streamed responses (SSE) and file responses are passed through untouched;
+Werkzeug already gives files validators and 304 handling.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from pathlib import Path
+from typing import Iterator, Optional, Set, Tuple
+
+from flask import Flask, Response, current_app, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PRECOMPRESSED_DIR = PROJECT_ROOT / "data" / "precompressed"
+PRECOMPRESS_SUFFIXES = (".json", ".js", ".css", ".svg")
+COMPRESSIBLE_MIMETYPES = (
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+try:
+    MIN_COMPRESS_BYTES = max(0, int(os.getenv("HTTP_MIN_COMPRESS_BYTES", "1024")))
+except ValueError:
+    MIN_COMPRESS_BYTES = 1024
+
+_BUILD_LOCK = threading.Lock()
+# One background builder: max-quality brotli is slow and must never run in a request.
+_BUILDER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precompress")
+_PENDING: Set[Tuple[Path, str]] = set()
+_PENDING_LOCK = threading.Lock()
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Content codings we can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding() -> Optional[str]:
+    """Best coding accepted by the current request, if any."""
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def compress(data: bytes, encoding: str, *, best: bool = False) -> bytes:
+    """Compress ``data``; ``best`` trades CPU for size (used for static variants)."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else 5)
+    if encoding == "gzip":
+        # mtime=0 keeps the output (and so the ETag) deterministic.
+        return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+    raise ValueError(f"Unsupported content coding {encoding!r}.")
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and (mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+# ----------------------------------------------------------------------
+# Dynamic responses
+# ----------------------------------------------------------------------
+def finalize_response(response: Response) -> Response:
+    """``after_request`` hook: validators, 304s and on-the-fly compression."""
+    if request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return response
+    if response.is_streamed or response.direct_passthrough or "Content-Encoding" in response.headers:
+        return response
+
+    body = response.get_data()
+    encoding = None
+    if is_compressible(response.mimetype):
+        response.vary.add("Accept-Encoding")
+        if len(body) >= MIN_COMPRESS_BYTES:
+            encoding = negotiate_encoding()
+
+    etag, weak = response.get_etag()
+    if etag is None:
+        etag, weak = hashlib.sha1(body).hexdigest(), False
+    # Each representation needs its own strong validator.
+    response.set_etag(f"{etag}-{encoding}" if encoding else etag, weak=weak)
+    if "Cache-Control" not in response.headers:
+        # Cacheable, but always revalidated (most pages sit behind a login).
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+    response.make_conditional(request)
+    if response.status_code == 304 or encoding is None:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+# ----------------------------------------------------------------------
+# Precompressed static files
+# ----------------------------------------------------------------------
+def precompressed_path(source: Path, static_root: Path, encoding: str) -> Path:
+    relative = Path(source).resolve().relative_to(Path(static_root).resolve())
+    return PRECOMPRESSED_DIR / f"{relative}{_EXTENSIONS[encoding]}"
+
+
+def fresh_variant(source: Path, static_root: Path, encoding: str) -> Optional[Path]:
+    """Path of the ``encoding`` variant of ``source`` if it is built and up to date."""
+    target = precompressed_path(source, static_root, encoding)
+    try:
+        if target.stat().st_mtime_ns >= Path(source).stat().st_mtime_ns:
+            return target
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def precompressed_variant(source: Path, static_root: Path, encoding: str) -> Optional[Path]:
+    """Path of the ``encoding`` variant of ``source``, built if missing or stale.
+
+    Returns None for files too small to be worth compressing. Building can
+    take seconds; request handlers use :func:`schedule_variant_build`.
+    """
+    source = Path(source)
+    if source.stat().st_size < MIN_COMPRESS_BYTES:
+        return None
+    target = fresh_variant(source, static_root, encoding)
+    if target is not None:
+        return target
+    target = precompressed_path(source, static_root, encoding)
+    with _BUILD_LOCK:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(compress(source.read_bytes(), encoding, best=True))
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, target)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+    return target
+
+
+def schedule_variant_build(source: Path, static_root: Path, encoding: str) -> None:
+    """Queue :func:`precompressed_variant` on the background builder (once per variant)."""
+    key = (Path(source), encoding)
+    with _PENDING_LOCK:
+        if key in _PENDING:
+            return
+        _PENDING.add(key)
+
+    def build() -> None:
+        try:
+            precompressed_variant(Path(source), Path(static_root), encoding)
+        except OSError as exc:
+            logger.warning("Could not precompress %s (%s): %s", source, encoding, exc)
+        finally:
+            with _PENDING_LOCK:
+                _PENDING.discard(key)
+
+    _BUILDER.submit(build)
+
+
+def _static_sources(static_root: Path) -> Iterator[Path]:
+    for path in sorted(Path(static_root).rglob("*")):
+        if path.is_file() and path.suffix in PRECOMPRESS_SUFFIXES:
+            yield path
+
+
+def precompress_static(static_root: Path) -> int:
+    """Build every missing or stale variant under ``static_root``; returns how many exist."""
+    built = 0
+    for source in _static_sources(static_root):
+        for encoding in available_encodings():
+            if precompressed_variant(source, static_root, encoding) is not None:
+                built += 1
+    return built
+
+
+def schedule_stale_variants(static_root: Path) -> None:
+    """Queue a background build of every missing or stale variant under ``static_root``."""
+    for source in _static_sources(static_root):
+        if source.stat().st_size < MIN_COMPRESS_BYTES:
+            continue
+        for encoding in available_encodings():
+            if fresh_variant(source, static_root, encoding) is None:
+                schedule_variant_build(source, static_root, encoding)
+
+
+def _gzip_on_the_fly(response: Response, path: str) -> Response:
+    """Swap the body of a full static file response for a fast gzip of ``path``."""
+    if response.status_code != 200 or request.method != "GET":
+        return response
+    with open(path, "rb") as handle:
+        body = compress(handle.read(), "gzip")
+    response.close()
+    response.direct_passthrough = False
+    response.set_data(body)
+    response.headers["Content-Encoding"] = "gzip"
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(f"{etag}-gzip", weak=weak)
+    return response
+
+
+def _wrap_static_view(app: Flask) -> None:
+    original = app.view_functions.get("static")
+    if original is None:
+        return
+
+    @wraps(original)
+    def static_view(filename: str) -> Response:
+        if not filename.endswith(PRECOMPRESS_SUFFIXES):
+            return original(filename=filename)
+        path = safe_join(current_app.static_folder, filename)
+        encoding = negotiate_encoding()
+        variant = None
+        pending = False
+        if path is not None and encoding is not None and os.path.isfile(path):
+            static_root = Path(current_app.static_folder)
+            variant = fresh_variant(Path(path), static_root, encoding)
+            pending = variant is None and os.path.getsize(path) >= MIN_COMPRESS_BYTES
+            if pending:
+                schedule_variant_build(Path(path), static_root, encoding)
+        if variant is None:
+            response = original(filename=filename)
+            if pending and request.accept_encodings["gzip"] and "Range" not in request.headers:
+                response = _gzip_on_the_fly(response, path)
+        else:
+            response = send_file(
+                variant,
+                mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                conditional=True,
+                max_age=current_app.get_send_file_max_age(filename),
+            )
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
+
+    app.view_functions["static"] = static_view
+
+
+def init_http_caching(app: Flask) -> None:
+    """Install compression, validators and precompressed static delivery on ``app``."""
+    app.after_request(finalize_response)
+    _wrap_static_view(app)
+    if app.static_folder and os.path.isdir(app.static_folder):
+        schedule_stale_variants(Path(app.static_folder))
+
+
+def _cli() -> int:
+    static_root = PROJECT_ROOT / "static"
+    print(f"{precompress_static(static_root)} precompressed variants up to date in {PRECOMPRESSED_DIR}")
+    return 0
+
+
+__all__ = [
+    "MIN_COMPRESS_BYTES",
+    "PRECOMPRESSED_DIR",
+    "available_encodings",
+    "compress",
+    "finalize_response",
+    "fresh_variant",
+    "init_http_caching",
+    "negotiate_encoding",
+    "precompress_static",
+    "precompressed_variant",
+    "schedule_stale_variants",
+    "schedule_variant_build",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(_cli())
@@ -0,0 +1,246 @@
+"""Shared cache of the scrim Google Sheet.
+
+``/scrims`` used to build a Sheets client and read the whole range on every
+view. :class:`ScrimSheetCache` keeps the last read in Redis (or, without
+Redis, in ``data/scrims/sheet.json``) so every gunicorn worker shares it:
+
+* fresh (younger than ``SCRIM_CACHE_TTL_SECONDS``): served as is;
+* stale: served as is while one background thread re-reads the sheet
+  (a Redis ``SET NX`` / lock file keeps it to one refresh across workers);
+* missing: read synchronously.
+
+:meth:`ScrimSheetCache.refresh` re-reads the sheet immediately (the "refresh
+now" button). Each process also keeps the decoded copy, re-reading the shared
+copy only when its stamp (Redis fetch time or file mtime) changes. An optional
+``parser`` turns the raw rows into records once per loaded copy; the result
+rides along as :attr:`ScrimSheet.records`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+import redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIM_CACHE_FILE = PROJECT_ROOT / "data" / "scrims" / "sheet.json"
+_REDIS_KEY = "scrims:sheet"
+_REDIS_LOCK_KEY = "scrims:sheet:refreshing"
+
+try:
+    SCRIM_CACHE_TTL_SECONDS = max(0, int(os.getenv("SCRIM_CACHE_TTL_SECONDS", "300")))
+except ValueError:
+    SCRIM_CACHE_TTL_SECONDS = 300
+
+try:
+    SCRIM_REFRESH_LOCK_SECONDS = max(10, int(os.getenv("SCRIM_REFRESH_LOCK_SECONDS", "120")))
+except ValueError:
+    SCRIM_REFRESH_LOCK_SECONDS = 120
+
+SheetRows = List[List[str]]
+
+
+@dataclass(frozen=True)
+class ScrimSheet:
+    values: SheetRows
+    fetched_at: float
+    records: Any = field(default=None, compare=False, repr=False)
+
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+
+class ScrimSheetCache:
+    """TTL cache with background refresh around a sheet reader."""
+
+    def __init__(
+        self,
+        fetcher: Callable[[], SheetRows],
+        *,
+        parser: Optional[Callable[[SheetRows], Any]] = None,
+        redis_conn: Optional[redis.Redis] = None,
+        path: Path = SCRIM_CACHE_FILE,
+        ttl: float = SCRIM_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.fetcher = fetcher
+        self.parser = parser
+        self.redis = redis_conn
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._local: Optional[Tuple[Optional[Tuple[str, object]], ScrimSheet]] = None
+        self._refreshing = False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get(self) -> ScrimSheet:
+        """Return the cached sheet, refreshing it in the background when stale."""
+        sheet = self._shared()
+        if sheet is None:
+            return self.refresh()
+        if sheet.age_seconds >= self.ttl:
+            self.refresh_in_background()
+        return sheet
+
+    def refresh(self) -> ScrimSheet:
+        """Read the sheet now and publish it to every worker."""
+        sheet = self._sheet(self.fetcher(), time.time())
+        self._store(sheet)
+        stamp = self._stored_stamp()
+        with self._lock:
+            self._local = (stamp, sheet)
+        return sheet
+
+    def refresh_in_background(self) -> bool:
+        """Start a refresh thread unless one is already running anywhere."""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        if not self._acquire_refresh_lock():
+            with self._lock:
+                self._refreshing = False
+            return False
+
+        def run() -> None:
+            try:
+                self.refresh()
+            except Exception:  # pragma: no cover - keep serving the stale copy
+                logger.exception("Background scrim sheet refresh failed")
+            finally:
+                self._release_refresh_lock()
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="scrim-sheet-refresh", daemon=True).start()
+        return True
+
+    # ------------------------------------------------------------------
+    # Shared storage (Redis, falling back to a local file)
+    # ------------------------------------------------------------------
+    def _shared(self) -> Optional[ScrimSheet]:
+        stamp = self._stored_stamp()
+        with self._lock:
+            local = self._local
+        if stamp is None:
+            return local[1] if local is not None else None
+        if local is not None and local[0] == stamp:
+            return local[1]
+        sheet = self._load(stamp)
+        if sheet is not None:
+            with self._lock:
+                self._local = (stamp, sheet)
+        return sheet
+
+    def _stored_stamp(self) -> Optional[Tuple[str, object]]:
+        """Cheap version marker of the shared copy: Redis fetch time, else file mtime."""
+        if self.redis is not None:
+            try:
+                raw = self.redis.hget(_REDIS_KEY, "fetched_at")
+                if raw is not None:
+                    return ("redis", raw)
+            except RedisError as exc:
+                logger.warning("Redis unavailable for the scrim cache, using %s: %s", self.path, exc)
+        try:
+            return ("file", self.path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def _load(self, stamp: Tuple[str, object]) -> Optional[ScrimSheet]:
+        try:
+            if stamp[0] == "redis":
+                fetched_at, values = self.redis.hmget(_REDIS_KEY, ["fetched_at", "values"])
+                if fetched_at is None or values is None:
+                    return None
+                return self._sheet(json.loads(values), float(fetched_at))
+            with self.path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+            return self._sheet(payload["values"], float(payload["fetched_at"]))
+        except (RedisError, FileNotFoundError, ValueError, KeyError) as exc:
+            logger.warning("Could not read the cached scrim sheet: %s", exc)
+            return None
+
+    def _sheet(self, values: SheetRows, fetched_at: float) -> ScrimSheet:
+        records = self.parser(values) if self.parser is not None else None
+        return ScrimSheet(values=values, fetched_at=fetched_at, records=records)
+
+    def _store(self, sheet: ScrimSheet) -> None:
+        if self.redis is not None:
+            try:
+                self.redis.hset(
+                    _REDIS_KEY, mapping={"fetched_at": repr(sheet.fetched_at), "values": json.dumps(sheet.values)}
+                )
+            except RedisError as exc:
+                logger.warning("Could not publish the scrim sheet to Redis: %s", exc)
+        # The file doubles as the fallback when Redis goes away.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump({"fetched_at": sheet.fetched_at, "values": sheet.values}, handle)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+
+    # ------------------------------------------------------------------
+    # Cross-worker refresh lock
+    # ------------------------------------------------------------------
+    @property
+    def _lock_path(self) -> Path:
+        return self.path.with_suffix(".lock")
+
+    def _acquire_refresh_lock(self) -> bool:
+        if self.redis is not None:
+            try:
+                return bool(self.redis.set(_REDIS_LOCK_KEY, os.getpid(), nx=True, ex=SCRIM_REFRESH_LOCK_SECONDS))
+            except RedisError:
+                pass
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if time.time() - self._lock_path.stat().st_mtime > SCRIM_REFRESH_LOCK_SECONDS:
+                # Left behind by a worker that died mid-refresh.
+                self._lock_path.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        return True
+
+    def _release_refresh_lock(self) -> None:
+        if self.redis is not None:
+            try:
+                self.redis.delete(_REDIS_LOCK_KEY)
+                return
+            except RedisError:
+                pass
+        try:
+            self._lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+__all__ = [
+    "SCRIM_CACHE_FILE",
+    "SCRIM_CACHE_TTL_SECONDS",
+    "ScrimSheet",
+    "ScrimSheetCache",
+]
@@ -8,6 +8,12 @@ if __name__ == "__main__":
     os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:6379/0")
     sys.path.insert(0, os.path.dirname(__file__))
 
+    from jobs.rankeds_job import RANKEDS_QUEUE, start_rankeds_scheduler
+    from jobs.search_player_job import SEARCH_QUEUE
+
     conn = Redis.from_url(os.environ["REDIS_URL"])
     q = Queue("analytical-reports", connection=conn)
-    Worker([q], connection=conn).work(with_scheduler=True)
+    rankeds_q = Queue(RANKEDS_QUEUE, connection=conn)
+    search_q = Queue(SEARCH_QUEUE, connection=conn)
+    start_rankeds_scheduler(conn)
+    Worker([search_q, q, rankeds_q], connection=conn).work(with_scheduler=True)